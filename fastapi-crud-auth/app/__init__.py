@@ -1,6 +1,23 @@
+from __future__ import annotations
+
 import edgedb
+import httpx
 from fastapi import Request
 
+from .queries import get_user_by_identity_async_edgeql as get_user_by_identity_qry
+
 
 def get_edgedb_client(request: Request) -> edgedb.AsyncIOClient:
-    return request.app.state.edgedb
+    # Bound to the caller's globals by `identity.authenticate`, if signed in.
+    client = getattr(request.state, "edgedb", None)
+    return client if client is not None else request.app.state.edgedb
+
+
+def get_current_user(
+    request: Request,
+) -> get_user_by_identity_qry.GetUserByIdentityResult | None:
+    return getattr(request.state, "user", None)
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http
@@ -6,23 +6,59 @@ import os
 import edgedb
 import httpx
 
-from fastapi import APIRouter, HTTPException, Request, Cookie, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Cookie, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from . import get_edgedb_client, get_http_client
 from .queries import create_user_async_edgeql as create_user_qry
 
 router = APIRouter()
 
-client = edgedb.create_async_client()
-
 class RequestData(BaseModel):
     name: str
     
 EDGEDB_AUTH_BASE_URL = os.getenv("EDGEDB_AUTH_BASE_URL")
 
+# Connecting is retried, sending is not: a retried sign-up could register twice.
+AUTH_CONNECT_RETRIES = 3
+AUTH_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+AUTH_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the client shared by every call to the auth extension."""
+    transport = httpx.AsyncHTTPTransport(
+        retries=AUTH_CONNECT_RETRIES, limits=AUTH_LIMITS
+    )
+    return httpx.AsyncClient(transport=transport, timeout=AUTH_TIMEOUT)
+
+
+def http_pool_stats(http: httpx.AsyncClient) -> dict[str, int]:
+    # httpx doesn't expose its pool; the transport is the one created above.
+    connections = http._transport._pool.connections
+    return {
+        "max_connections": AUTH_LIMITS.max_connections,
+        "open": len(connections),
+        "in_use": sum(not connection.is_idle() for connection in connections),
+    }
+
+
+async def auth_request(
+    http: httpx.AsyncClient, method: str, path: str, **kwargs
+) -> httpx.Response:
+    try:
+        return await http.request(method, f"{EDGEDB_AUTH_BASE_URL}{path}", **kwargs)
+    except httpx.TransportError:
+        raise HTTPException(status_code=503, detail="Auth server unavailable.")
+
+
 @router.post("/auth/signup")
-async def handle_signup(request: Request):
+async def handle_signup(
+    request: Request,
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    http: httpx.AsyncClient = Depends(get_http_client),
+):
     body = await request.json()
     email = body.get("email")
     name = body.get("name")
@@ -32,8 +68,7 @@ async def handle_signup(request: Request):
         raise HTTPException(status_code=400, detail="Missing email, password, or name.")
 
     verifier, challenge = generate_pkce()
-    register_url = f"{EDGEDB_AUTH_BASE_URL}/register"
-    register_response = httpx.post(register_url, json={
+    register_response = await auth_request(http, "POST", "/register", json={
         "challenge": challenge,
         "email": email,
         "password": password,
@@ -41,12 +76,13 @@ async def handle_signup(request: Request):
         "verify_url": "http://localhost:8000/auth/verify",
     })
 
-    if register_response.status_code != 200 and response.status_code != 201:
+    if register_response.status_code not in (200, 201):
         return JSONResponse(status_code=400, content={"message": "Registration failed"})
     
     code = register_response.json().get("code")
-    token_url = f"{EDGEDB_AUTH_BASE_URL}/token"
-    token_response = httpx.get(token_url, params={"code": code, "verifier": verifier})
+    token_response = await auth_request(
+        http, "GET", "/token", params={"code": code, "verifier": verifier}
+    )
 
     if token_response.status_code != 200:
         return JSONResponse(status_code=400, content={"message": "Token exchange failed"})
@@ -66,7 +102,9 @@ async def handle_signup(request: Request):
     return response
 
 @router.post("/auth/signin")
-async def handle_signin(request: Request):
+async def handle_signin(
+    request: Request, http: httpx.AsyncClient = Depends(get_http_client)
+):
     body = await request.json()
     email = body.get("email")
     password = body.get("password")
@@ -76,8 +114,7 @@ async def handle_signin(request: Request):
         raise HTTPException(status_code=400, detail="Missing email, password, or provider.")
 
     verifier, challenge = generate_pkce()
-    authenticate_url = f"{EDGEDB_AUTH_BASE_URL}/authenticate"
-    response = httpx.post(authenticate_url, json={
+    response = await auth_request(http, "POST", "/authenticate", json={
         "challenge": challenge,
         "email": email,
         "password": password,
@@ -88,8 +125,9 @@ async def handle_signin(request: Request):
         return JSONResponse(status_code=400, content={"message": "Authentication failed"})
 
     code = response.json().get("code")
-    token_url = f"{EDGEDB_AUTH_BASE_URL}/token"
-    token_response = httpx.get(token_url, params={"code": code, "verifier": verifier})
+    token_response = await auth_request(
+        http, "GET", "/token", params={"code": code, "verifier": verifier}
+    )
     
     if token_response.status_code != 200:
         return JSONResponse(status_code=400, content={"message": "Token exchange failed"})
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import base64
+import collections
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable
+
+from fastapi import Request, Response
+
+from .queries import get_user_by_identity_async_edgeql as get_user_by_identity_qry
+
+AUTH_TOKEN_COOKIE = "edgedb-auth-token"
+
+# The `auth_signing_key` of the auth extension's config. Without it, tokens
+# can't be verified and every caller is anonymous.
+EDGEDB_AUTH_SIGNING_KEY = os.getenv("EDGEDB_AUTH_SIGNING_KEY")
+
+IDENTITY_CACHE_SIZE = 10_000
+IDENTITY_CACHE_TTL = 60.0
+
+
+################################
+# Tokens
+################################
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def verify_token(token: str, key: bytes) -> uuid.UUID | None:
+    """Return the identity of an auth extension token, if it's valid.
+
+    The tokens are HS256 JWTs whose subject is the identity, so checking the
+    signature and expiry here gives the same answer as the database would.
+    """
+    try:
+        header, payload, signature = token.split(".")
+        if json.loads(_b64decode(header)).get("alg") != "HS256":
+            return None
+        expected = hmac.new(
+            key, f"{header}.{payload}".encode(), hashlib.sha256
+        ).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        claims = json.loads(_b64decode(payload))
+        if (exp := claims.get("exp")) is not None and exp <= time.time():
+            return None
+        return uuid.UUID(claims["sub"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+################################
+# Identities
+################################
+
+
+class IdentityCache:
+    """Map identities to their users for `ttl` seconds.
+
+    Meant for the single event loop of one worker, so there's no locking.
+    Renamed or deleted users are seen once their entry expires.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = IDENTITY_CACHE_SIZE,
+        ttl: float = IDENTITY_CACHE_TTL,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: collections.OrderedDict[
+            uuid.UUID, tuple[float, get_user_by_identity_qry.GetUserByIdentityResult]
+        ] = collections.OrderedDict()
+
+    def get(
+        self, identity_id: uuid.UUID
+    ) -> get_user_by_identity_qry.GetUserByIdentityResult | None:
+        entry = self._entries.get(identity_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= self._timer():
+            del self._entries[identity_id]
+            return None
+        return user
+
+    def set(
+        self,
+        identity_id: uuid.UUID,
+        user: get_user_by_identity_qry.GetUserByIdentityResult,
+    ) -> None:
+        self._entries[identity_id] = (self._timer() + self.ttl, user)
+        self._entries.move_to_end(identity_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def resolve(
+        self, client: Any, identity_id: uuid.UUID
+    ) -> get_user_by_identity_qry.GetUserByIdentityResult | None:
+        if (user := self.get(identity_id)) is not None:
+            return user
+        user = await get_user_by_identity_qry.get_user_by_identity(
+            client, identity_id=identity_id
+        )
+        # Signed up but not created yet: look again next time.
+        if user is not None:
+            self.set(identity_id, user)
+        return user
+
+
+async def authenticate(request: Request, call_next: Callable) -> Response:
+    """Find out who the caller is and bind the database client to them.
+
+    Routes get the bound client from `get_edgedb_client` and the user from
+    `get_current_user`; anonymous callers get the plain client.
+    """
+    request.state.user = None
+    request.state.edgedb = None
+    token = request.cookies.get(AUTH_TOKEN_COOKIE)
+    client = request.app.state.edgedb
+    key = EDGEDB_AUTH_SIGNING_KEY
+
+    if token and key and (identity_id := verify_token(token, key.encode())):
+        user = await request.app.state.identities.resolve(client, identity_id)
+        if user is not None:
+            request.state.user = user
+            request.state.edgedb = client.with_globals(current_user_id=user.id)
+
+    return await call_next(request)
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import functools
+import logging
 
 import edgedb
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
-from app import events, users, auth
+from app import auth, events, identity, users
+
+logger = logging.getLogger(__name__)
 
 
 async def setup_edgedb(app):
     client = app.state.edgedb = edgedb.create_async_client()
     await client.ensure_connected()
+    logger.info("EdgeDB pool allows up to %d connections", client.max_concurrency)
 
 
 async def shutdown_edgedb(app):
@@ -19,16 +23,55 @@ async def shutdown_edgedb(app):
     await client.aclose()
 
 
+async def setup_http(app):
+    app.state.http = auth.create_http_client()
+
+
+async def shutdown_http(app):
+    http, app.state.http = app.state.http, None
+    await http.aclose()
+
+
+def pool_stats(app) -> dict[str, dict[str, int]]:
+    client = app.state.edgedb
+    max_concurrency, free_size = client.max_concurrency, client.free_size
+    http = auth.http_pool_stats(app.state.http)
+    return {
+        "edgedb": {
+            "max_concurrency": max_concurrency,
+            "free": free_size,
+            "in_use": max_concurrency - free_size,
+        },
+        "http": http,
+        # Every connection this worker may hold, across all of its pools.
+        "total": {
+            "max": max_concurrency + http["max_connections"],
+            "in_use": max_concurrency - free_size + http["in_use"],
+        },
+    }
+
+
 def make_app():
     app = FastAPI()
+    app.state.identities = identity.IdentityCache()
 
     app.on_event("startup")(functools.partial(setup_edgedb, app))
     app.on_event("shutdown")(functools.partial(shutdown_edgedb, app))
+    app.on_event("startup")(functools.partial(setup_http, app))
+    app.on_event("shutdown")(functools.partial(shutdown_http, app))
+
+    if identity.EDGEDB_AUTH_SIGNING_KEY is None:
+        logger.warning("EDGEDB_AUTH_SIGNING_KEY is not set: all callers are anonymous")
+    app.middleware("http")(identity.authenticate)
 
     @app.get("/health_check", include_in_schema=False)
     async def health_check() -> dict[str, str]:
         return {"status": "Ok"}
 
+    @app.get("/pool_stats", include_in_schema=False)
+    async def get_pool_stats() -> dict[str, dict[str, int]]:
+        return pool_stats(app)
+
     # Set all CORS enabled origins
     app.add_middleware(
         CORSMiddleware,
@@ -40,7 +83,7 @@ def make_app():
 
     app.include_router(events.router)
     app.include_router(users.router)
-    fast_api.include_router(auth.router)
+    app.include_router(auth.router)
 
     return app
 
@@ -7,9 +7,11 @@ import edgedb
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
-from . import get_edgedb_client
+from . import get_current_user, get_edgedb_client
 from .queries import create_user_async_edgeql as create_user_qry
 from .queries import delete_user_async_edgeql as delete_user_qry
+from .queries import get_current_user_async_edgeql as get_current_user_qry
+from .queries import get_user_by_identity_async_edgeql as get_user_by_identity_qry
 from .queries import get_user_by_name_async_edgeql as get_user_by_name_qry
 from .queries import get_users_async_edgeql as get_users_qry
 from .queries import update_user_async_edgeql as update_user_qry
@@ -44,6 +46,29 @@ async def get_users(
         return user
 
 
+@router.get("/users/me")
+async def get_me(
+    user: get_user_by_identity_qry.GetUserByIdentityResult | None = Depends(
+        get_current_user
+    ),
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+) -> get_current_user_qry.GetCurrentUserResult:
+    if user is None:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail={"error": "Not signed in."},
+        )
+    # The client is bound to the caller, so `global current_user` is a
+    # lookup by id.
+    me = await get_current_user_qry.get_current_user(client)
+    if not me:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail={"error": f"User '{user.name}' was not found."},
+        )
+    return me
+
+
 ################################
 # Create users
 ################################
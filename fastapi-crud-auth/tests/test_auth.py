@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from http import HTTPStatus
+
+import httpx
+
+from app.identity import AUTH_TOKEN_COOKIE, IdentityCache, verify_token
+from app.queries import get_current_user_async_edgeql as get_current_user_qry
+from app.queries import get_user_by_identity_async_edgeql as get_user_by_identity_qry
+
+
+def mock_auth_server(mocker, handler):
+    mocker.patch("app.auth.EDGEDB_AUTH_BASE_URL", "http://auth.test")
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_signin(mocker, test_client):
+    def handler(request):
+        if request.url.path.endswith("/authenticate"):
+            return httpx.Response(HTTPStatus.OK, json={"code": "code"})
+        assert request.url.params["code"] == "code"
+        return httpx.Response(HTTPStatus.OK, json={"auth_token": "token"})
+
+    test_client.app.state.http = mock_auth_server(mocker, handler)
+    response = test_client.post(
+        "/auth/signin",
+        json={"email": "a@b.c", "password": "secret", "provider": "local"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert "edgedb-auth-token=token" in response.headers["set-cookie"]
+
+
+def test_signin_auth_server_unavailable(mocker, test_client):
+    def handler(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    test_client.app.state.http = mock_auth_server(mocker, handler)
+    response = test_client.post(
+        "/auth/signin",
+        json={"email": "a@b.c", "password": "secret", "provider": "local"},
+    )
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def make_token(key, claims, alg="HS256"):
+    def encode(data):
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    header = encode(json.dumps({"alg": alg, "typ": "JWT"}).encode())
+    payload = encode(json.dumps(claims).encode())
+    signature = hmac.new(key, f"{header}.{payload}".encode(), hashlib.sha256)
+    return f"{header}.{payload}.{encode(signature.digest())}"
+
+
+def test_verify_token():
+    identity_id = uuid.uuid4()
+    claims = {"sub": str(identity_id), "exp": time.time() + 60}
+    assert verify_token(make_token(b"key", claims), b"key") == identity_id
+    assert verify_token(make_token(b"other", claims), b"key") is None
+    assert verify_token(make_token(b"key", claims, alg="none"), b"key") is None
+    assert verify_token("not a token", b"key") is None
+
+    claims["exp"] = time.time() - 1
+    assert verify_token(make_token(b"key", claims), b"key") is None
+
+
+def test_identity_cache(mocker):
+    user = get_user_by_identity_qry.GetUserByIdentityResult(
+        id=uuid.uuid4(), name="Test"
+    )
+    get_user_by_identity = mocker.patch(
+        "app.identity.get_user_by_identity_qry.get_user_by_identity",
+        return_value=user,
+    )
+    now = [0.0]
+    cache = IdentityCache(ttl=10, timer=lambda: now[0])
+    identity_id = uuid.uuid4()
+
+    assert asyncio.run(cache.resolve(None, identity_id)) is user
+    assert asyncio.run(cache.resolve(None, identity_id)) is user
+    assert get_user_by_identity.call_count == 1
+
+    now[0] = 10
+    assert asyncio.run(cache.resolve(None, identity_id)) is user
+    assert get_user_by_identity.call_count == 2
+
+
+def test_authenticate_binds_current_user(mocker, test_client):
+    user = get_user_by_identity_qry.GetUserByIdentityResult(
+        id=uuid.uuid4(), name="Test"
+    )
+    mocker.patch("app.identity.EDGEDB_AUTH_SIGNING_KEY", "key")
+    mocker.patch(
+        "app.identity.get_user_by_identity_qry.get_user_by_identity",
+        return_value=user,
+    )
+    get_current_user = mocker.patch(
+        "app.users.get_current_user_qry.get_current_user",
+        return_value=get_current_user_qry.GetCurrentUserResult(
+            id=user.id, name=user.name, created_at=None
+        ),
+    )
+    with_globals = mocker.spy(test_client.app.state.edgedb, "with_globals")
+    token = make_token(b"key", {"sub": str(uuid.uuid4())})
+    test_client.cookies.set(AUTH_TOKEN_COOKIE, token)
+
+    response = test_client.get("/users/me")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["name"] == "Test"
+    with_globals.assert_called_once_with(current_user_id=user.id)
+    # The route queried through the client bound to the caller.
+    assert get_current_user.call_args.args[0] is with_globals.spy_return
+
+
+def test_get_me_anonymous(mocker, test_client):
+    mocker.patch("app.identity.EDGEDB_AUTH_SIGNING_KEY", "key")
+    response = test_client.get("/users/me")
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_authenticate_without_signing_key(mocker, test_client):
+    mocker.patch("app.identity.EDGEDB_AUTH_SIGNING_KEY", None)
+    with_globals = mocker.spy(test_client.app.state.edgedb, "with_globals")
+    token = make_token(b"key", {"sub": str(uuid.uuid4())})
+    test_client.cookies.set(AUTH_TOKEN_COOKIE, token)
+
+    response = test_client.get("/users/me")
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert with_globals.call_count == 0
@@ -0,0 +1,14 @@
+from http import HTTPStatus
+
+
+def test_pool_stats(test_client):
+    response = test_client.get("/pool_stats")
+    assert response.status_code == HTTPStatus.OK
+    stats = response.json()
+    assert stats["edgedb"]["in_use"] == (
+        stats["edgedb"]["max_concurrency"] - stats["edgedb"]["free"]
+    )
+    assert stats["http"]["open"] == 0
+    assert stats["total"]["max"] == (
+        stats["edgedb"]["max_concurrency"] + stats["http"]["max_connections"]
+    )
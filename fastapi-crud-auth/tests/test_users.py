@@ -1,7 +1,6 @@
 """
-Currently these tests use the same database that the app uses.
-In a real application, you'd want to patch the 'client' to use a
-separate database.
+These tests run against a database of their own, one per test worker.
+See `test_database` in `conftest.py`.
 
 """
 
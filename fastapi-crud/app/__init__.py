@@ -1,6 +1,34 @@
 import edgedb
 from fastapi import Request
 
+from .cache import LRUCache
+from .config import Settings
+from .snapshot import ResponseSnapshot
+
 
 def get_edgedb_client(request: Request) -> edgedb.AsyncIOClient:
     return request.app.state.edgedb
+
+
+def get_edgedb_read_client(request: Request) -> edgedb.AsyncIOClient:
+    return request.app.state.edgedb_read
+
+
+def get_settings(request: Request) -> Settings:
+    return request.app.state.settings
+
+
+def get_user_cache(request: Request) -> LRUCache:
+    return request.app.state.user_cache
+
+
+def get_event_cache(request: Request) -> LRUCache:
+    return request.app.state.event_cache
+
+
+def get_change_cache(request: Request) -> LRUCache:
+    return request.app.state.change_cache
+
+
+def get_event_snapshot(request: Request) -> ResponseSnapshot:
+    return request.app.state.event_snapshot
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from http import HTTPStatus
+from typing import Sequence
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+MAX_BULK_SIZE = 10_000
+
+
+class BulkError(BaseModel):
+    index: int
+    name: str
+    error: str
+
+
+class RenameData(BaseModel):
+    current_name: str
+    name: str
+
+
+def check_bulk_size(items: Sequence, action: str, kind: str) -> None:
+    if len(items) > MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail={"error": f"Cannot {action} more than {MAX_BULK_SIZE} {kind}."},
+        )
+
+
+def validate_renames(
+    renames: Sequence[RenameData], label: str
+) -> tuple[list[BulkError], dict[str, RenameData]]:
+    """Split renames into errors and the valid ones, by current name.
+
+    A name may only appear once on either side of a batch: renaming `a` to
+    `b` and `b` to `c` in the same statement would see `b` twice.
+    """
+    errors: list[BulkError] = []
+    valid: dict[str, RenameData] = {}
+    names: set[str] = set()
+    for index, rename in enumerate(renames):
+        error = None
+        if len(rename.name) > 50:
+            error = f"{label} cannot be longer than 50 characters."
+        elif repeated := {rename.current_name, rename.name} & names:
+            error = f"{label} '{min(repeated)}' appears more than once."
+        if error:
+            errors.append(BulkError(index=index, name=rename.current_name, error=error))
+            continue
+        valid[rename.current_name] = rename
+        names.update((rename.current_name, rename.name))
+    return errors, valid
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import time
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+from .coalescing import SingleFlight
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class LRUCache(Generic[K, V]):
+    """A bounded LRU cache whose entries also expire after `ttl` seconds.
+
+    Meant for the single event loop of one worker, so there's no locking.
+    A `ttl` of 0 disables caching altogether. Concurrent misses on the same
+    key share a single load through `flights`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+        flights: SingleFlight | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.flights = flights if flights is not None else SingleFlight()
+        self._timer = timer
+        self._entries: collections.OrderedDict[K, tuple[float, V]] = (
+            collections.OrderedDict()
+        )
+        # Bumped on every invalidation, so that a load which raced with a
+        # write doesn't put the stale result back into the cache.
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (self._timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get_or_load(self, key: K, load: Callable[[], Awaitable[V]]) -> V:
+        """Return the cached value for `key`, loading it on a miss.
+
+        Empty results are not cached.
+        """
+        if (value := self.get(key)) is not None:
+            return value
+
+        version = self._version
+        value = await self.flights.do(key, load)
+        if value is not None and version == self._version:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, *keys: K) -> None:
+        self._version += 1
+        self.flights.forget_all()
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[V], bool]) -> None:
+        self.invalidate(*[k for k, (_, v) in self._entries.items() if predicate(v)])
+
+    def clear(self) -> None:
+        self.invalidate(*list(self._entries))
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **dataclasses.asdict(self.stats),
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "flights": self.flights.snapshot(),
+        }
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import functools
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Key for reads of a whole table, which can't collide with any name.
+ALL_ROWS: Any = object()
+
+
+@dataclasses.dataclass
+class SingleFlightStats:
+    executed: int = 0
+    coalesced: int = 0
+
+
+class SingleFlight(Generic[K, V]):
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The shared call runs in its own task, so a caller going away (e.g. the
+    client disconnecting) doesn't cancel it for everybody else.
+    """
+
+    def __init__(self) -> None:
+        self.stats = SingleFlightStats()
+        self._calls: dict[K, asyncio.Future[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(fn())
+            call.add_done_callback(functools.partial(self._done, key))
+            self.stats.executed += 1
+        else:
+            self.stats.coalesced += 1
+        return await asyncio.shield(call)
+
+    def _done(self, key: K, call: asyncio.Future[V]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Every waiter may have gone away; don't warn about the exception.
+        if not call.cancelled():
+            call.exception()
+
+    def forget_all(self) -> None:
+        """Make later callers start a fresh call, e.g. after a write."""
+        self._calls.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**dataclasses.asdict(self.stats), "in_flight": len(self._calls)}
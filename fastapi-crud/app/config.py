@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: T) -> int | T:
+    value = os.getenv(name)
+    return default if value is None else int(value)
+
+
+def _env_float(name: str, default: T) -> float | T:
+    value = os.getenv(name)
+    return default if value is None else float(value)
+
+
+@dataclasses.dataclass(frozen=True)
+class Settings:
+    # Serve read endpoints straight from the JSON produced by the server.
+    raw_json: bool = False
+    # Size and lifetime (in seconds) of the by-name lookup caches.
+    cache_size: int = 1024
+    cache_ttl: float = 30.0
+    # Reads and writes get their own connection pools, so that long list
+    # reads can't starve writes. `None` leaves the size up to the server and
+    # the query timeouts (in seconds) off.
+    read_pool_size: int | None = None
+    write_pool_size: int | None = None
+    connect_timeout: float = 10.0
+    read_timeout: float | None = None
+    write_timeout: float | None = None
+    # Compile every query on the server before reporting healthy.
+    warmup: bool = True
+    # Serve the unfiltered event list from memory for up to this many seconds
+    # after it was read, keeping a gzipped copy too. 0 turns it off.
+    snapshot_max_age: float = 0.0
+    snapshot_gzip: bool = True
+
+    @classmethod
+    def from_env(cls) -> Settings:
+        return cls(
+            raw_json=_env_flag("APP_RAW_JSON"),
+            cache_size=_env_int("APP_CACHE_SIZE", cls.cache_size),
+            cache_ttl=_env_float("APP_CACHE_TTL", cls.cache_ttl),
+            read_pool_size=_env_int("APP_READ_POOL_SIZE", cls.read_pool_size),
+            write_pool_size=_env_int("APP_WRITE_POOL_SIZE", cls.write_pool_size),
+            connect_timeout=_env_float("APP_CONNECT_TIMEOUT", cls.connect_timeout),
+            read_timeout=_env_float("APP_READ_TIMEOUT", cls.read_timeout),
+            write_timeout=_env_float("APP_WRITE_TIMEOUT", cls.write_timeout),
+            warmup=_env_flag("APP_WARMUP", cls.warmup),
+            snapshot_max_age=_env_float("APP_SNAPSHOT_MAX_AGE", cls.snapshot_max_age),
+            snapshot_gzip=_env_flag("APP_SNAPSHOT_GZIP", cls.snapshot_gzip),
+        )
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import hashlib
+from http import HTTPStatus
+from typing import Any
+
+import edgedb
+from fastapi import HTTPException, Request
+
+from .queries import get_data_version_async_edgeql as get_data_version_qry
+
+ETAG_HEADER = "ETag"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    # `If-None-Match` uses the weak comparison.
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def check_etag(
+    request: Request, client: edgedb.AsyncIOExecutor, *parts: Any
+) -> str:
+    """Return the ETag of a list read, or respond 304 if the client has it.
+
+    The tag is derived from the row counts and latest modification time of
+    both types, since events embed their host and users their events. Rows
+    read by a query started after this call are at least as new as the tag,
+    but a shared in-flight read may have started before it: key such reads
+    by the tag, so that only requests with the same tag share them.
+    """
+    version = await get_data_version_qry.get_data_version(client)
+    etag = make_etag(
+        version.users,
+        version.events,
+        version.modified_at,
+        request.url.path,
+        request.url.query,
+        *parts,
+    )
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={ETAG_HEADER: etag}
+        )
+    return etag
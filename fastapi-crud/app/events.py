@@ -1,21 +1,100 @@
 from __future__ import annotations
 
+import asyncio
+import datetime
+import functools
+import json
+import re
+import uuid
 from http import HTTPStatus
-from typing import List
+from typing import Any, Awaitable, Callable, Container, List, Literal, Sequence, Union
 
 import edgedb
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from pydantic_core import to_json
 
-from . import get_edgedb_client
+from . import (
+    get_change_cache,
+    get_edgedb_client,
+    get_edgedb_read_client,
+    get_event_cache,
+    get_event_snapshot,
+    get_settings,
+)
+from .bulk import BulkError, RenameData, check_bulk_size, validate_renames
+from .cache import LRUCache
+from .coalescing import ALL_ROWS
+from .config import Settings
+from .etag import ETAG_HEADER, check_etag
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    iter_pages,
+    keyset_pages,
+    page_args,
+    paginate,
+)
 from .queries import create_event_async_edgeql as create_event_qry
+from .queries import create_events_async_edgeql as create_events_qry
 from .queries import delete_event_async_edgeql as delete_event_qry
+from .queries import delete_events_async_edgeql as delete_events_qry
 from .queries import get_event_by_name_async_edgeql as get_event_by_name_qry
+from .queries import get_event_changes_async_edgeql as get_event_changes_qry
 from .queries import get_events_async_edgeql as get_events_qry
+from .queries import get_events_by_schedule_async_edgeql as get_events_by_schedule_qry
+from .queries import (
+    get_events_by_schedule_desc_async_edgeql as get_events_by_schedule_desc_qry,
+)
+from .queries import get_events_first_page_async_edgeql as get_events_first_page_qry
+from .queries import get_events_page_async_edgeql as get_events_page_qry
+from .queries import get_latest_event_change_async_edgeql as get_latest_change_qry
 from .queries import update_event_async_edgeql as update_event_qry
+from .queries import update_events_async_edgeql as update_events_qry
+from .raw_json import JSONExecutor, raw_response
+from .snapshot import ResponseSnapshot
+from .streaming import ndjson_response
 
 router = APIRouter()
 
+# Stand-ins for an open end of a schedule range. Both bounds are always sent
+# so that the filter stays a plain range over the index.
+MIN_SCHEDULE = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+MAX_SCHEDULE = datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+
+# How long `/events/changes` may hold a request open, and how often a held
+# request checks for changes meanwhile.
+MAX_CHANGES_WAIT = 30.0
+CHANGES_POLL_INTERVAL = 1.0
+
+# Changes are reported once they are this old, so that a write transaction
+# that commits within this long of its statement is not skipped.
+CHANGES_LAG = datetime.timedelta(seconds=5)
+
+# How long deleted events are remembered. Keep in step with the
+# `prune_tombstones` trigger in the schema.
+TOMBSTONE_RETENTION = datetime.timedelta(days=30)
+
+# Sorts before every id, for a cursor at a point in time.
+MIN_ID = uuid.UUID(int=0)
+
+# Key of the latest change time in the change cache.
+LATEST_CHANGE: Any = object()
+
+# The extended ISO 8601 form that the server's `<datetime>` cast accepts.
+# `datetime.fromisoformat` is more lenient, e.g. with the basic form.
+DATETIME_FORMAT = re.compile(
+    r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?(Z|[+-]\d{2}(:?\d{2})?)"
+)
+
+INVALID_DATETIME_ERROR = (
+    "Invalid datetime format. "
+    "Datetime string must look like this: '2010-12-27T23:59:59-07:00'"
+)
+
 
 class RequestData(BaseModel):
     name: str
@@ -24,6 +103,29 @@ class RequestData(BaseModel):
     host_name: str
 
 
+class BulkCreateResult(BaseModel):
+    created: List[create_events_qry.CreateEventsResult]
+    errors: List[BulkError]
+
+
+class BulkRenameResult(BaseModel):
+    updated: List[update_events_qry.UpdateEventsResultUpdated]
+    errors: List[BulkError]
+
+
+class BulkDeleteResult(BaseModel):
+    deleted: List[delete_events_qry.DeleteEventsResult]
+    errors: List[BulkError]
+
+
+class EventChanges(BaseModel):
+    inserted: List[get_event_changes_qry.GetEventChangesResultUpserted]
+    updated: List[get_event_changes_qry.GetEventChangesResultUpserted]
+    deleted: List[get_event_changes_qry.GetEventChangesResultDeleted]
+    cursor: str
+    has_more: bool
+
+
 ################################
 # Get events
 ################################
@@ -31,20 +133,229 @@ class RequestData(BaseModel):
 
 @router.get("/events")
 async def get_events(
+    request: Request,
+    response: Response,
     name: str = Query(None, max_length=50),
-    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
-) -> List[get_events_qry.GetEventsResult] | get_event_by_name_qry.GetEventByNameResult:
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: str = Query(None),
+    from_: datetime.datetime = Query(None, alias="from"),
+    to: datetime.datetime = Query(None),
+    order: Literal["asc", "desc"] = Query(None),
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_read_client),
+    settings: Settings = Depends(get_settings),
+    cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
+) -> Union[
+    List[get_events_qry.GetEventsResult],
+    List[get_events_first_page_qry.GetEventsFirstPageResult],
+    List[get_events_page_qry.GetEventsPageResult],
+    List[get_events_by_schedule_qry.GetEventsByScheduleResult],
+    List[get_events_by_schedule_desc_qry.GetEventsByScheduleDescResult],
+    get_event_by_name_qry.GetEventByNameResult,
+]:
+    # Paged reads stay decoded: the next cursor is built from the last row.
+    executor = JSONExecutor(client) if settings.raw_json else client
+
+    ranged = from_ is not None or to is not None
+    if ranged and (limit is not None or after is not None):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": "'from' and 'to' cannot be combined with pagination."},
+        )
+    if order is not None and not ranged:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": "'order' requires 'from' or 'to'."},
+        )
+
     if not name:
-        events = await get_events_qry.get_events(client)
-        return events
+        unfiltered = not ranged and limit is None and after is None
+        if unfiltered and (snapshot := event_snapshot.current()) is not None:
+            return snapshot.response(request)
+
+        etag = await check_etag(request, client, settings.raw_json)
+        response.headers[ETAG_HEADER] = etag
+
+        if ranged:
+            events = await get_events_by_schedule(executor, from_, to, order)
+            return raw_response(events, headers=response.headers)
+
+        if unfiltered:
+            # Only requests that saw the same data version share a read.
+            events = await cache.flights.do(
+                (ALL_ROWS, etag), functools.partial(get_events_qry.get_events, executor)
+            )
+            return raw_response(events, headers=response.headers)
+
+        events = await events_pages(client)(**page_args(limit, after))
+        return paginate(response, events, limit)
     else:
-        event = await get_event_by_name_qry.get_event_by_name(client, name=name)
+        event = await cache.get_or_load(
+            name,
+            functools.partial(
+                get_event_by_name_qry.get_event_by_name, executor, name=name
+            ),
+        )
         if not event:
             raise HTTPException(
                 status_code=HTTPStatus.NOT_FOUND,
                 detail={"error": f"Event '{name}' does not exist."},
             )
-        return event
+        return raw_response(event)
+
+
+async def load_events_json(client: edgedb.AsyncIOClient) -> str:
+    """Read all events as the decoded response's JSON, for the event snapshot.
+
+    The server's JSON renders datetimes its own way, so the rows are encoded
+    with Pydantic here, off the request path.
+    """
+    events = await get_events_qry.get_events(client)
+    body = await asyncio.to_thread(to_json, events)
+    return body.decode()
+
+
+def events_pages(
+    client: edgedb.AsyncIOExecutor,
+) -> Callable[..., Awaitable[Sequence[Any]]]:
+    return keyset_pages(
+        functools.partial(get_events_first_page_qry.get_events_first_page, client),
+        functools.partial(get_events_page_qry.get_events_page, client),
+    )
+
+
+async def get_events_by_schedule(
+    executor: edgedb.AsyncIOExecutor,
+    from_: datetime.datetime | None,
+    to: datetime.datetime | None,
+    order: str | None,
+) -> list[Any]:
+    if any(bound is not None and bound.tzinfo is None for bound in (from_, to)):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": INVALID_DATETIME_ERROR},
+        )
+
+    if order == "desc":
+        query = get_events_by_schedule_desc_qry.get_events_by_schedule_desc
+    else:
+        query = get_events_by_schedule_qry.get_events_by_schedule
+    return await query(
+        executor,
+        from_schedule=from_ or MIN_SCHEDULE,
+        to_schedule=to or MAX_SCHEDULE,
+    )
+
+
+# ################################
+# Event changes
+# ################################
+
+
+@router.get("/events/changes")
+async def get_event_changes(
+    since: datetime.datetime = Query(None),
+    after: str = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    wait: float = Query(0, ge=0, le=MAX_CHANGES_WAIT),
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_read_client),
+    change_cache: LRUCache = Depends(get_change_cache),
+) -> EventChanges:
+    """Return the next page of events inserted, updated or deleted.
+
+    Start from `since`, or from the beginning without it, then pass the
+    returned `cursor` as `after`. From the beginning, every event is reported
+    as inserted. `has_more` says that another page is ready. With `wait`, the
+    request is held for up to that many seconds until there is something to
+    report.
+    """
+    if since is not None and since.tzinfo is None:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": INVALID_DATETIME_ERROR},
+        )
+    if since is not None and after is not None:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": "'since' cannot be combined with 'after'."},
+        )
+
+    if after is not None:
+        after_time, after_id = decode_cursor(after)
+    else:
+        after_time, after_id = since or MIN_SCHEDULE, MIN_ID
+    oldest = datetime.datetime.now(datetime.timezone.utc) - TOMBSTONE_RETENTION
+    if after_time != MIN_SCHEDULE and after_time < oldest:
+        raise HTTPException(
+            status_code=HTTPStatus.GONE,
+            detail={"error": "Deletions that old are forgotten. Start over."},
+        )
+
+    fetch_changes = functools.partial(
+        get_event_changes_qry.get_event_changes,
+        client,
+        after_time=after_time,
+        after_id=after_id,
+        limit=limit,
+        lag=CHANGES_LAG,
+    )
+    changes = await fetch_changes()
+
+    # Held requests only look at the latest change time, which they share.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while not changes.upserted and not changes.deleted:
+        if loop.time() + CHANGES_POLL_INTERVAL > deadline:
+            break
+        await asyncio.sleep(CHANGES_POLL_INTERVAL)
+        latest = await change_cache.get_or_load(
+            LATEST_CHANGE,
+            functools.partial(
+                get_latest_change_qry.get_latest_event_change, client, lag=CHANGES_LAG
+            ),
+        )
+        if latest is not None and latest > after_time:
+            changes = await fetch_changes()
+
+    return page_changes(changes, after_time, after_id, limit)
+
+
+def page_changes(
+    changes: get_event_changes_qry.GetEventChangesResult,
+    after_time: datetime.datetime,
+    after_id: uuid.UUID,
+    limit: int,
+) -> EventChanges:
+    # Both lists are in change order and hold up to `limit` rows each, so the
+    # page is the first `limit` of the two together.
+    upserted = [((e.modified_at, e.id), e) for e in changes.upserted]
+    deleted = [((e.deleted_at, e.id), e) for e in changes.deleted]
+    keys = sorted(key for key, _ in upserted + deleted)[:limit]
+    last = keys[-1] if keys else (after_time, after_id)
+
+    page = [e for key, e in upserted if key <= last]
+    full = limit in (len(upserted), len(deleted))
+    return EventChanges(
+        # Inserts have the same `created_at` and `modified_at`.
+        inserted=[e for e in page if (e.created_at, e.id) > (after_time, after_id)],
+        updated=[e for e in page if (e.created_at, e.id) <= (after_time, after_id)],
+        deleted=[e for key, e in deleted if key <= last],
+        cursor=encode_cursor(*last),
+        has_more=full or len(upserted) + len(deleted) > limit,
+    )
+
+
+# ################################
+# Export events
+# ################################
+
+
+@router.get("/events/export")
+async def export_events(
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_read_client),
+) -> StreamingResponse:
+    return ndjson_response(iter_pages(events_pages(client), page_size))
 
 
 # ################################
@@ -56,6 +367,8 @@ async def get_events(
 async def post_event(
     event: RequestData,
     client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
 ) -> create_event_qry.CreateEventResult:
     try:
         created_event = await create_event_qry.create_event(
@@ -82,9 +395,91 @@ async def post_event(
             detail=f"Event name '{event.name}' already exists,",
         )
 
+    cache.invalidate(event.name)
+    event_snapshot.invalidate()
     return created_event
 
 
+@router.post("/events/bulk", status_code=HTTPStatus.CREATED)
+async def post_events_bulk(
+    events: List[RequestData],
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
+) -> BulkCreateResult:
+    check_bulk_size(events, "create", "events")
+
+    # Reject what we can before talking to the database, so that a single bad
+    # item doesn't abort the whole statement.
+    errors: list[BulkError] = []
+    valid: dict[str, RequestData] = {}
+    for index, event in enumerate(events):
+        if error := validate_event(event, seen=valid):
+            errors.append(BulkError(index=index, name=event.name, error=error))
+        else:
+            valid[event.name] = event
+
+    created_events: list[create_events_qry.CreateEventsResult] = []
+    if valid:
+        try:
+            created_events = await create_events_qry.create_events(
+                client,
+                data=json.dumps([event.model_dump() for event in valid.values()]),
+            )
+        except edgedb.errors.InvalidValueError:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail={"error": INVALID_DATETIME_ERROR},
+            )
+        except edgedb.errors.ConstraintViolationError as e:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail={"error": str(e)},
+            )
+
+    # Items skipped by 'unless conflict' are missing from the result.
+    created_names = {event.name for event in created_events}
+    cache.invalidate(*created_names)
+    event_snapshot.invalidate()
+    errors.extend(
+        BulkError(
+            index=index,
+            name=event.name,
+            error=f"Event name '{event.name}' already exists.",
+        )
+        for index, event in enumerate(events)
+        if valid.get(event.name) is event and event.name not in created_names
+    )
+    errors.sort(key=lambda error: error.index)
+
+    return BulkCreateResult(created=created_events, errors=errors)
+
+
+def validate_event(event: RequestData, seen: dict[str, RequestData]) -> str | None:
+    if len(event.name) > 50:
+        return "Event name cannot be longer than 50 characters."
+
+    if event.name in seen:
+        return f"Event name '{event.name}' appears more than once."
+
+    if not DATETIME_FORMAT.fullmatch(event.schedule):
+        return INVALID_DATETIME_ERROR
+    try:
+        datetime.datetime.fromisoformat(event.schedule)
+    except ValueError:
+        return INVALID_DATETIME_ERROR
+
+    return None
+
+
+def is_hosted_by(event: Any, user_names: Container[str]) -> bool:
+    """Check the host of an event, whether decoded or raw JSON."""
+    if isinstance(event, str):
+        host = json.loads(event).get("host")
+        return host is not None and host.get("name") in user_names
+    return event.host is not None and event.host.name in user_names
+
+
 # ################################
 # Update events
 # ################################
@@ -95,6 +490,8 @@ async def put_event(
     event: RequestData,
     current_name: str,
     client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
 ) -> update_event_qry.UpdateEventResult:
     try:
         updated_event = await update_event_qry.update_event(
@@ -127,9 +524,60 @@ async def put_event(
             detail={"error": f"Update event '{event.name}' failed."},
         )
 
+    cache.invalidate(current_name, event.name)
+    event_snapshot.invalidate()
     return updated_event
 
 
+@router.put("/events/bulk")
+async def put_events_bulk(
+    renames: List[RenameData],
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
+) -> BulkRenameResult:
+    check_bulk_size(renames, "rename", "events")
+    errors, valid = validate_renames(renames, "Event name")
+
+    updated_events: list[update_events_qry.UpdateEventsResultUpdated] = []
+    taken: set[str] = set()
+    if valid:
+        try:
+            result = await update_events_qry.update_events(
+                client,
+                data=json.dumps([rename.model_dump() for rename in valid.values()]),
+            )
+        except edgedb.errors.ConstraintViolationError as e:
+            # A new name was taken while we were renaming.
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail={"error": str(e)},
+            )
+
+        updated_events = result.updated
+        taken = set(result.taken)
+
+    updated_names = {event.name for event in updated_events}
+    cache.invalidate(*valid, *updated_names)
+    event_snapshot.invalidate()
+    errors.extend(
+        BulkError(
+            index=index,
+            name=rename.current_name,
+            error=(
+                f"Event name '{rename.name}' already exists."
+                if rename.name in taken
+                else f"Event '{rename.current_name}' was not found."
+            ),
+        )
+        for index, rename in enumerate(renames)
+        if valid.get(rename.current_name) is rename and rename.name not in updated_names
+    )
+    errors.sort(key=lambda error: error.index)
+
+    return BulkRenameResult(updated=updated_events, errors=errors)
+
+
 # ################################
 # Delete events
 # ################################
@@ -139,6 +587,8 @@ async def put_event(
 async def delete_event(
     name: str,
     client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
 ) -> delete_event_qry.DeleteEventResult:
     deleted_event = await delete_event_qry.delete_event(client, name=name)
 
@@ -148,4 +598,29 @@ async def delete_event(
             detail={"error": f"Delete event '{name}' failed."},
         )
 
+    cache.invalidate(name)
+    event_snapshot.invalidate()
     return deleted_event
+
+
+@router.delete("/events/bulk")
+async def delete_events_bulk(
+    names: List[str],
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
+) -> BulkDeleteResult:
+    check_bulk_size(names, "delete", "events")
+
+    deleted_events = await delete_events_qry.delete_events(client, names=names)
+
+    deleted_names = {event.name for event in deleted_events}
+    cache.invalidate(*deleted_names)
+    event_snapshot.invalidate()
+    errors = [
+        BulkError(index=index, name=name, error=f"Event '{name}' was not found.")
+        for index, name in enumerate(names)
+        if name not in deleted_names
+    ]
+
+    return BulkDeleteResult(deleted=deleted_events, errors=errors)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import importlib
+import pkgutil
+from types import ModuleType
+from typing import Iterator
+
+QUERIES_PACKAGE = "app.queries"
+QUERY_MODULE_SUFFIX = "_async_edgeql"
+
+
+def iter_query_functions() -> Iterator[tuple[ModuleType, str]]:
+    """Yield each module generated by `edgedb-py` with its function's name.
+
+    Every `app/queries/<name>.edgeql` becomes `<name>_async_edgeql.py`
+    defining a single `<name>()` coroutine function.
+    """
+    package = importlib.import_module(QUERIES_PACKAGE)
+    for module_info in sorted(pkgutil.iter_modules(package.__path__)):
+        if not module_info.name.endswith(QUERY_MODULE_SUFFIX):
+            continue
+        module = importlib.import_module(f"{QUERIES_PACKAGE}.{module_info.name}")
+        name = module_info.name.removesuffix(QUERY_MODULE_SUFFIX)
+        if hasattr(module, name):
+            yield module, name
@@ -1,33 +1,145 @@
 from __future__ import annotations
 
+import asyncio
+import datetime
 import functools
+import logging
+import time
+from http import HTTPStatus
 
 import edgedb
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
-from app import events, users
+from app import events, metrics, users, warmup
+from app.cache import LRUCache
+from app.config import Settings
+from app.etag import ETAG_HEADER
+from app.pagination import NEXT_CURSOR_HEADER
+from app.snapshot import ResponseSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def create_edgedb_client(
+    settings: Settings, max_concurrency: int | None, query_timeout: float | None
+) -> edgedb.AsyncIOClient:
+    client = edgedb.create_async_client(
+        max_concurrency=max_concurrency,
+        timeout=settings.connect_timeout,
+    )
+    if query_timeout:
+        client = client.with_config(
+            query_execution_timeout=datetime.timedelta(seconds=query_timeout)
+        )
+    return client
 
 
 async def setup_edgedb(app):
-    client = app.state.edgedb = edgedb.create_async_client()
-    await client.ensure_connected()
+    settings = app.state.settings
+    client = app.state.edgedb = create_edgedb_client(
+        settings, settings.write_pool_size, settings.write_timeout
+    )
+    read_client = app.state.edgedb_read = create_edgedb_client(
+        settings, settings.read_pool_size, settings.read_timeout
+    )
+    metrics.instrument_pool(client, "write")
+    metrics.instrument_pool(read_client, "read")
+    await asyncio.gather(client.ensure_connected(), read_client.ensure_connected())
+    if app.state.event_snapshot.enabled:
+        app.state.event_snapshot.refresh()
+
+    if settings.warmup:
+        # Let the server accept requests meanwhile; `/health_check` reports
+        # not ready until this is done.
+        app.state.warmup = asyncio.create_task(warm_up_edgedb(app))
+    else:
+        app.state.ready = True
+
+
+async def warm_up_edgedb(app):
+    start = time.perf_counter()
+    try:
+        await warmup.warm_up(
+            [app.state.edgedb, app.state.edgedb_read],
+            raw_json=app.state.settings.raw_json,
+        )
+    except Exception:
+        logger.exception("Query warm-up failed")
+    else:
+        logger.info("Query warm-up took %.1f ms", (time.perf_counter() - start) * 1000)
+    app.state.ready = True
 
 
 async def shutdown_edgedb(app):
+    if (task := app.state.warmup) is not None:
+        task.cancel()
+    await app.state.event_snapshot.aclose()
     client, app.state.edgedb = app.state.edgedb, None
-    await client.aclose()
+    read_client, app.state.edgedb_read = app.state.edgedb_read, None
+    await asyncio.gather(client.aclose(), read_client.aclose())
+
+
+def pool_stats(client: edgedb.AsyncIOClient) -> dict[str, int]:
+    max_concurrency, free_size = client.max_concurrency, client.free_size
+    return {
+        "max_concurrency": max_concurrency,
+        "free": free_size,
+        "in_use": max_concurrency - free_size,
+    }
 
 
-def make_app():
+def make_app(settings: Settings | None = None):
     app = FastAPI()
+    settings = app.state.settings = settings or Settings.from_env()
+    app.state.ready = False
+    app.state.warmup = None
+    app.state.user_cache = LRUCache(settings.cache_size, settings.cache_ttl)
+    app.state.event_cache = LRUCache(settings.cache_size, settings.cache_ttl)
+    # Only holds the time of the latest change, shared by long-polling clients.
+    app.state.change_cache = LRUCache(1, events.CHANGES_POLL_INTERVAL)
+    app.state.event_snapshot = ResponseSnapshot(
+        lambda: events.load_events_json(app.state.edgedb_read),
+        settings.snapshot_max_age,
+        settings.snapshot_gzip,
+    )
 
     app.on_event("startup")(functools.partial(setup_edgedb, app))
     app.on_event("shutdown")(functools.partial(shutdown_edgedb, app))
 
+    metrics.instrument_queries()
+    app.middleware("http")(metrics.record_request)
+
     @app.get("/health_check", include_in_schema=False)
-    async def health_check() -> dict[str, str]:
-        return {"status": "Ok"}
+    async def health_check() -> JSONResponse:
+        if not app.state.ready:
+            return JSONResponse(
+                {"status": "Warming up"}, status_code=HTTPStatus.SERVICE_UNAVAILABLE
+            )
+        return JSONResponse({"status": "Ok"})
+
+    @app.get("/pool_stats", include_in_schema=False)
+    async def get_pool_stats() -> dict[str, dict[str, int]]:
+        return {
+            "read": pool_stats(app.state.edgedb_read),
+            "write": pool_stats(app.state.edgedb),
+        }
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics() -> Response:
+        metrics.observe_pool(app.state.edgedb_read, "read")
+        metrics.observe_pool(app.state.edgedb, "write")
+        return metrics.render()
+
+    @app.get("/cache_stats", include_in_schema=False)
+    async def cache_stats() -> dict[str, dict]:
+        return {
+            "users": app.state.user_cache.snapshot(),
+            "events": app.state.event_cache.snapshot(),
+            "changes": app.state.change_cache.snapshot(),
+            "snapshot": app.state.event_snapshot.snapshot(),
+        }
 
     # Set all CORS enabled origins
     app.add_middleware(
@@ -36,6 +148,7 @@ def make_app():
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
     )
 
     app.include_router(events.router)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import functools
+import time
+from typing import Any, Awaitable, Callable
+
+import edgedb
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+from .generated import iter_query_functions
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests, including database calls.",
+    ["method", "route", "status"],
+)
+QUERY_DURATION = Histogram(
+    "edgedb_query_duration_seconds",
+    "Time spent in generated query functions, including pool wait.",
+    ["query"],
+)
+QUERY_ERRORS = Counter(
+    "edgedb_query_errors_total",
+    "Errors raised by generated query functions.",
+    ["query", "error"],
+)
+QUERIES_IN_FLIGHT = Gauge(
+    "edgedb_queries_in_flight",
+    "Generated query functions currently running.",
+    ["query"],
+)
+POOL_WAIT = Histogram(
+    "edgedb_pool_wait_seconds",
+    "Time spent waiting for a connection from a client pool.",
+    ["pool"],
+)
+POOL_CONNECTIONS = Gauge(
+    "edgedb_pool_connections",
+    "Connections of a client pool, by state.",
+    ["pool", "state"],
+)
+
+
+################################
+# Queries
+################################
+
+
+def _instrument_query(name: str, fn: Callable[..., Awaitable[Any]]) -> Callable:
+    duration = QUERY_DURATION.labels(name)
+    in_flight = QUERIES_IN_FLIGHT.labels(name)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        in_flight.inc()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            QUERY_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            in_flight.dec()
+            duration.observe(time.perf_counter() - start)
+
+    wrapper._instrumented = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def instrument_queries() -> None:
+    """Wrap every function generated by `edgedb-py` with metrics.
+
+    The routes look the functions up on their modules at call time, so
+    replacing the module attributes is enough. Safe to call more than once.
+    """
+    for module, name in iter_query_functions():
+        fn = getattr(module, name)
+        if not getattr(fn, "_instrumented", False):
+            setattr(module, name, _instrument_query(name, fn))
+
+
+################################
+# Pools
+################################
+
+
+def instrument_pool(client: edgedb.AsyncIOClient, pool: str) -> None:
+    """Record how long queries wait for a connection from `client`'s pool."""
+    # The client has no public hook around connection acquisition, so wrap
+    # the pool implementation's; clients made with `with_config()` share it.
+    impl = getattr(client, "_impl", None)
+    if impl is None:
+        return
+
+    acquire = impl.acquire
+    wait = POOL_WAIT.labels(pool)
+
+    async def timed_acquire(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await acquire(*args, **kwargs)
+        finally:
+            wait.observe(time.perf_counter() - start)
+
+    impl.acquire = timed_acquire
+
+
+def observe_pool(client: edgedb.AsyncIOClient, pool: str) -> None:
+    max_concurrency, free_size = client.max_concurrency, client.free_size
+    POOL_CONNECTIONS.labels(pool, "max").set(max_concurrency)
+    POOL_CONNECTIONS.labels(pool, "free").set(free_size)
+    POOL_CONNECTIONS.labels(pool, "in_use").set(max_concurrency - free_size)
+
+
+################################
+# HTTP
+################################
+
+
+async def record_request(request: Request, call_next: Callable) -> Response:
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template rather than path to keep cardinality bounded.
+    route = request.scope.get("route")
+    REQUEST_DURATION.labels(
+        request.method,
+        route.path if route is not None else "unmatched",
+        response.status_code,
+    ).observe(time.perf_counter() - start)
+    return response
+
+
+def render() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import base64
+import datetime
+import uuid
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Awaitable, Callable, Protocol, Sequence, TypeVar
+
+from fastapi import HTTPException, Response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Keyed(Protocol):
+    id: uuid.UUID
+    created_at: datetime.datetime
+
+
+T = TypeVar("T", bound=Keyed)
+
+
+################################
+# Cursors
+################################
+
+
+def encode_cursor(created_at: datetime.datetime, id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, id = raw.split("|")
+        after_created_at = datetime.datetime.fromisoformat(created_at)
+        # The query compares with a timezone-aware datetime.
+        if after_created_at.tzinfo is None:
+            raise ValueError(created_at)
+        return after_created_at, uuid.UUID(id)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": f"Invalid cursor '{cursor}'."},
+        )
+
+
+################################
+# Pages
+################################
+
+
+def keyset_pages(
+    first_page: Callable[..., Awaitable[Sequence[T]]],
+    next_page: Callable[..., Awaitable[Sequence[T]]],
+) -> Callable[..., Awaitable[Sequence[T]]]:
+    """Combine a `get_*_first_page` query and its `get_*_page` query.
+
+    The first page has no keyset filter at all, and the later ones one that
+    the index can serve as a range, so a page costs the same however deep
+    into the table it is.
+    """
+
+    def fetch_page(
+        *,
+        limit: int,
+        after_created_at: datetime.datetime | None = None,
+        after_id: uuid.UUID | None = None,
+    ) -> Awaitable[Sequence[T]]:
+        if after_created_at is None:
+            return first_page(limit=limit)
+        return next_page(
+            limit=limit, after_created_at=after_created_at, after_id=after_id
+        )
+
+    return fetch_page
+
+
+def page_args(limit: int | None, after: str | None) -> dict[str, Any]:
+    """Build the arguments of a page query from `keyset_pages`.
+
+    One extra row is requested so that we can tell whether another page
+    follows without issuing a second query.
+    """
+    after_created_at, after_id = decode_cursor(after) if after else (None, None)
+    return {
+        "limit": (limit or DEFAULT_PAGE_SIZE) + 1,
+        "after_created_at": after_created_at,
+        "after_id": after_id,
+    }
+
+
+def paginate(response: Response, rows: Sequence[T], limit: int | None) -> list[T]:
+    """Trim the look-ahead row and expose the next cursor as a header."""
+    limit = limit or DEFAULT_PAGE_SIZE
+    page = list(rows[:limit])
+    if len(rows) > limit:
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return page
+
+
+async def iter_pages(
+    fetch_page: Callable[..., Awaitable[Sequence[T]]], page_size: int
+) -> AsyncIterator[Sequence[T]]:
+    """Walk the pages from `keyset_pages` from the first row to the last."""
+    after_created_at, after_id = None, None
+    while True:
+        rows = await fetch_page(
+            limit=page_size, after_created_at=after_created_at, after_id=after_id
+        )
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after_created_at, after_id = rows[-1].created_at, rows[-1].id
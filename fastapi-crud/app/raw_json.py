@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, TypeVar
+
+import edgedb
+from fastapi import Response
+
+T = TypeVar("T")
+
+
+class JSONExecutor:
+    """Make generated query functions return the server's JSON as-is.
+
+    The generated `*_async_edgeql` functions only ever call `query` and
+    `query_single` on the executor they are given, so redirecting those to
+    their `*_json` counterparts skips decoding into dataclasses without
+    duplicating any query text.
+    """
+
+    def __init__(self, executor: edgedb.AsyncIOExecutor):
+        self._executor = executor
+
+    async def query(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._executor.query_json(query, *args, **kwargs)
+
+    async def query_single(self, query: str, *args: Any, **kwargs: Any) -> str | None:
+        result = await self._executor.query_single_json(query, *args, **kwargs)
+        # Keep `if not result` checks in the routes working.
+        return None if result == "null" else result
+
+    async def query_required_single(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._executor.query_required_single_json(query, *args, **kwargs)
+
+
+def raw_response(
+    result: T | str, headers: Mapping[str, str] | None = None
+) -> T | Response:
+    """Wrap JSON produced by a `JSONExecutor`; pass anything else through.
+
+    Returning a `Response` makes FastAPI skip response model validation and
+    serialization entirely. It also drops the headers set on the injected
+    response, so pass those as `headers`.
+    """
+    if isinstance(result, str):
+        return Response(content=result, media_type="application/json", headers=headers)
+    return result
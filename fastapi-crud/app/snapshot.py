@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import gzip
+import logging
+import time
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+
+from .etag import ETAG_HEADER, etag_matches, make_etag
+
+logger = logging.getLogger(__name__)
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() == "gzip":
+            return params.replace(" ", "") not in {"q=0", "q=0.0", "q=0.00"}
+    return False
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    body: bytes
+    gzipped: bytes | None
+    etag: str
+    # When the query behind it was sent, so the age is never understated.
+    built_at: float
+
+    def response(self, request: Request) -> Response:
+        body, etag, headers = self.body, self.etag, {"Vary": "Accept-Encoding"}
+        if self.gzipped is not None and accepts_gzip(
+            request.headers.get("accept-encoding")
+        ):
+            # A strong ETag must differ between content codings.
+            body, etag = self.gzipped, f'{self.etag[:-1]}-gzip"'
+            headers["Content-Encoding"] = "gzip"
+        headers[ETAG_HEADER] = etag
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+
+class ResponseSnapshot:
+    """A whole response body, kept serialized in memory and rebuilt on writes.
+
+    `current()` only hands out a snapshot that is younger than `max_age`
+    seconds and that no write in this process happened after. Otherwise
+    the caller falls back to the database while a rebuild runs in the
+    background. A `max_age` of 0 disables the snapshot altogether.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[str]],
+        max_age: float,
+        compress: bool = True,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.max_age = max_age
+        self.compress = compress
+        self.rebuilds = 0
+        self._load = load
+        self._timer = timer
+        self._snapshot: Snapshot | None = None
+        self._task: asyncio.Task | None = None
+        # Bumped on every write, so that a rebuild which raced with one
+        # isn't served.
+        self._version = 0
+        self._built_version = -1
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age > 0
+
+    def current(self) -> Snapshot | None:
+        if not self.enabled:
+            return None
+        if not self._is_fresh():
+            self.refresh()
+            return None
+        return self._snapshot
+
+    def _is_fresh(self) -> bool:
+        snapshot = self._snapshot
+        if snapshot is None or self._built_version != self._version:
+            return False
+        return self._timer() - snapshot.built_at <= self.max_age
+
+    def invalidate(self) -> None:
+        """Stop serving the snapshot and rebuild it, e.g. after a write."""
+        if not self.enabled:
+            return
+        self._version += 1
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Start a rebuild in the background, unless one is running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._rebuild())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _rebuild(self) -> None:
+        while True:
+            version = self._version
+            built_at = self._timer()
+            try:
+                body = (await self._load()).encode()
+                gzipped = None
+                if self.compress:
+                    gzipped = await asyncio.to_thread(gzip.compress, body)
+            except Exception:
+                logger.exception("Failed to rebuild snapshot")
+                return
+            self._snapshot = Snapshot(
+                body=body, gzipped=gzipped, etag=make_etag(body), built_at=built_at
+            )
+            self._built_version = version
+            self.rebuilds += 1
+            # Go again if a write came in while loading.
+            if version == self._version:
+                return
+
+    def snapshot(self) -> dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "max_age": self.max_age,
+            "rebuilds": self.rebuilds,
+            "fresh": self.enabled and self._is_fresh(),
+            "size": len(snapshot.body) if snapshot else 0,
+            "gzipped_size": (
+                len(snapshot.gzipped) if snapshot and snapshot.gzipped else 0
+            ),
+        }
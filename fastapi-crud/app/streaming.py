@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from typing import Any, AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_jsonable_python
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _encode(row: Any) -> str:
+    # Pydantic's encoder, so datetimes read the same as in the JSON responses
+    # (UTC as `Z`).
+    return json.dumps(dataclasses.asdict(row), default=to_jsonable_python)
+
+
+async def _iter_ndjson(pages: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    # One chunk per page: the first page goes out as soon as it is fetched
+    # and only a single page is ever held in memory.
+    async for rows in pages:
+        yield "".join(f"{_encode(row)}\n" for row in rows).encode()
+
+
+def ndjson_response(pages: AsyncIterator[Sequence[Any]]) -> StreamingResponse:
+    return StreamingResponse(_iter_ndjson(pages), media_type=NDJSON_MEDIA_TYPE)
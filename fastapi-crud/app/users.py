@@ -1,18 +1,53 @@
 from __future__ import annotations
 
+import functools
+import json
 from http import HTTPStatus
-from typing import List
+from typing import Any, Awaitable, Callable, List, Literal, Sequence, Union
 
 import edgedb
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from . import get_edgedb_client
+from . import (
+    get_edgedb_client,
+    get_edgedb_read_client,
+    get_event_cache,
+    get_event_snapshot,
+    get_settings,
+    get_user_cache,
+)
+from .bulk import BulkError, RenameData, check_bulk_size, validate_renames
+from .cache import LRUCache
+from .coalescing import ALL_ROWS
+from .config import Settings
+from .etag import ETAG_HEADER, check_etag
+from .events import is_hosted_by
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    iter_pages,
+    keyset_pages,
+    page_args,
+    paginate,
+)
 from .queries import create_user_async_edgeql as create_user_qry
 from .queries import delete_user_async_edgeql as delete_user_qry
+from .queries import delete_users_async_edgeql as delete_users_qry
 from .queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from .queries import (
+    get_user_with_events_by_name_async_edgeql as get_user_with_events_by_name_qry,
+)
 from .queries import get_users_async_edgeql as get_users_qry
+from .queries import get_users_first_page_async_edgeql as get_users_first_page_qry
+from .queries import get_users_page_async_edgeql as get_users_page_qry
+from .queries import get_users_with_events_async_edgeql as get_users_with_events_qry
 from .queries import update_user_async_edgeql as update_user_qry
+from .queries import update_users_async_edgeql as update_users_qry
+from .raw_json import JSONExecutor, raw_response
+from .snapshot import ResponseSnapshot
+from .streaming import ndjson_response
 
 router = APIRouter()
 
@@ -21,6 +56,16 @@ class RequestData(BaseModel):
     name: str
 
 
+class BulkRenameResult(BaseModel):
+    updated: List[update_users_qry.UpdateUsersResultUpdated]
+    errors: List[BulkError]
+
+
+class BulkDeleteResult(BaseModel):
+    deleted: List[delete_users_qry.DeleteUsersResultDeleted]
+    errors: List[BulkError]
+
+
 ################################
 # Get users
 ################################
@@ -28,20 +73,104 @@ class RequestData(BaseModel):
 
 @router.get("/users")
 async def get_users(
+    request: Request,
+    response: Response,
     name: str = Query(None, max_length=50),
-    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
-) -> List[get_users_qry.GetUsersResult] | get_user_by_name_qry.GetUserByNameResult:
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: str = Query(None),
+    include: Literal["events"] = Query(None),
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_read_client),
+    settings: Settings = Depends(get_settings),
+    cache: LRUCache = Depends(get_user_cache),
+) -> Union[
+    List[get_users_qry.GetUsersResult],
+    List[get_users_first_page_qry.GetUsersFirstPageResult],
+    List[get_users_page_qry.GetUsersPageResult],
+    List[get_users_with_events_qry.GetUsersWithEventsResult],
+    get_user_by_name_qry.GetUserByNameResult,
+    get_user_with_events_by_name_qry.GetUserWithEventsByNameResult,
+]:
+    # Paged reads stay decoded: the next cursor is built from the last row.
+    executor = JSONExecutor(client) if settings.raw_json else client
+
+    if include == "events" and (limit is not None or after is not None):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": "'include' cannot be combined with pagination."},
+        )
+
     if not name:
-        users = await get_users_qry.get_users(client)
-        return users
+        etag = await check_etag(request, client, settings.raw_json)
+        response.headers[ETAG_HEADER] = etag
+
+    if include == "events":
+        users = await get_users_with_events(executor, name)
+        return raw_response(users, headers=response.headers)
+
+    if not name:
+        if limit is None and after is None:
+            # Only requests that saw the same data version share a read.
+            users = await cache.flights.do(
+                (ALL_ROWS, etag), functools.partial(get_users_qry.get_users, executor)
+            )
+            return raw_response(users, headers=response.headers)
+
+        users = await users_pages(client)(**page_args(limit, after))
+        return paginate(response, users, limit)
     else:
-        user = await get_user_by_name_qry.get_user_by_name(client, name=name)
+        user = await cache.get_or_load(
+            name,
+            functools.partial(
+                get_user_by_name_qry.get_user_by_name, executor, name=name
+            ),
+        )
         if not user:
             raise HTTPException(
                 status_code=HTTPStatus.NOT_FOUND,
                 detail={"error": f"Username '{name}' does not exist."},
             )
-        return user
+        return raw_response(user)
+
+
+async def get_users_with_events(
+    executor: edgedb.AsyncIOExecutor, name: str | None
+) -> Any:
+    # A single query follows the `.<host` backlink for every user, instead of
+    # one request per user to `GET /events`.
+    if not name:
+        return await get_users_with_events_qry.get_users_with_events(executor)
+
+    user = await get_user_with_events_by_name_qry.get_user_with_events_by_name(
+        executor, name=name
+    )
+    if not user:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail={"error": f"Username '{name}' does not exist."},
+        )
+    return user
+
+
+def users_pages(
+    client: edgedb.AsyncIOExecutor,
+) -> Callable[..., Awaitable[Sequence[Any]]]:
+    return keyset_pages(
+        functools.partial(get_users_first_page_qry.get_users_first_page, client),
+        functools.partial(get_users_page_qry.get_users_page, client),
+    )
+
+
+################################
+# Export users
+################################
+
+
+@router.get("/users/export")
+async def export_users(
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_read_client),
+) -> StreamingResponse:
+    return ndjson_response(iter_pages(users_pages(client), page_size))
 
 
 ################################
@@ -53,6 +182,7 @@ async def get_users(
 async def post_user(
     user: RequestData,
     client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_user_cache),
 ) -> create_user_qry.CreateUserResult:
     try:
         created_user = await create_user_qry.create_user(client, name=user.name)
@@ -61,6 +191,8 @@ async def post_user(
             status_code=HTTPStatus.BAD_REQUEST,
             detail={"error": f"Username '{user.name}' already exists."},
         )
+
+    cache.invalidate(user.name)
     return created_user
 
 
@@ -74,6 +206,9 @@ async def put_user(
     user: RequestData,
     current_name: str,
     client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_user_cache),
+    event_cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
 ) -> update_user_qry.UpdateUserResult:
     try:
         updated_user = await update_user_qry.update_user(
@@ -92,9 +227,65 @@ async def put_user(
             status_code=HTTPStatus.NOT_FOUND,
             detail={"error": f"User '{current_name}' was not found."},
         )
+
+    cache.invalidate(current_name, user.name)
+    # Cached events embed the name of their host.
+    event_cache.invalidate_where(lambda event: is_hosted_by(event, {current_name}))
+    event_snapshot.invalidate()
     return updated_user
 
 
+@router.put("/users/bulk")
+async def put_users_bulk(
+    renames: List[RenameData],
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_user_cache),
+    event_cache: LRUCache = Depends(get_event_cache),
+    event_snapshot: ResponseSnapshot = Depends(get_event_snapshot),
+) -> BulkRenameResult:
+    check_bulk_size(renames, "rename", "users")
+    errors, valid = validate_renames(renames, "Username")
+
+    updated_users: list[update_users_qry.UpdateUsersResultUpdated] = []
+    taken: set[str] = set()
+    if valid:
+        try:
+            result = await update_users_qry.update_users(
+                client,
+                data=json.dumps([rename.model_dump() for rename in valid.values()]),
+            )
+        except edgedb.errors.ConstraintViolationError as e:
+            # A new name was taken while we were renaming.
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail={"error": str(e)},
+            )
+
+        updated_users = result.updated
+        taken = set(result.taken)
+
+    updated_names = {user.name for user in updated_users}
+    cache.invalidate(*valid, *updated_names)
+    event_cache.invalidate_where(lambda event: is_hosted_by(event, valid))
+    event_snapshot.invalidate()
+    errors.extend(
+        BulkError(
+            index=index,
+            name=rename.current_name,
+            error=(
+                f"Username '{rename.name}' already exists."
+                if rename.name in taken
+                else f"User '{rename.current_name}' was not found."
+            ),
+        )
+        for index, rename in enumerate(renames)
+        if valid.get(rename.current_name) is rename and rename.name not in updated_names
+    )
+    errors.sort(key=lambda error: error.index)
+
+    return BulkRenameResult(updated=updated_users, errors=errors)
+
+
 ################################
 # Delete users
 ################################
@@ -104,6 +295,7 @@ async def put_user(
 async def delete_user(
     name: str,
     client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_user_cache),
 ) -> delete_user_qry.DeleteUserResult:
     try:
         deleted_user = await delete_user_qry.delete_user(
@@ -121,4 +313,44 @@ async def delete_user(
             status_code=HTTPStatus.NOT_FOUND,
             detail={"error": f"User '{name}' was not found."},
         )
+
+    cache.invalidate(name)
     return deleted_user
+
+
+@router.delete("/users/bulk")
+async def delete_users_bulk(
+    names: List[str],
+    client: edgedb.AsyncIOClient = Depends(get_edgedb_client),
+    cache: LRUCache = Depends(get_user_cache),
+) -> BulkDeleteResult:
+    check_bulk_size(names, "delete", "users")
+
+    # Hosts are left out of the statement, so that they don't fail the batch.
+    try:
+        result = await delete_users_qry.delete_users(client, names=names)
+    except edgedb.errors.ConstraintViolationError:
+        # An event got a host among `names` while we were deleting.
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail={"error": "User attached to an event. Cannot delete."},
+        )
+
+    deleted_names = {user.name for user in result.deleted}
+    hosts = set(result.hosts)
+    cache.invalidate(*deleted_names)
+    errors = [
+        BulkError(
+            index=index,
+            name=name,
+            error=(
+                "User attached to an event. Cannot delete."
+                if name in hosts
+                else f"User '{name}' was not found."
+            ),
+        )
+        for index, name in enumerate(names)
+        if name not in deleted_names
+    ]
+
+    return BulkDeleteResult(deleted=result.deleted, errors=errors)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import inspect
+import logging
+import time
+from typing import Any, Iterable
+
+import edgedb
+from edgedb.protocol.protocol import OutputFormat
+
+from .generated import iter_query_functions
+
+logger = logging.getLogger(__name__)
+
+
+class _Captured(Exception):
+    def __init__(self, method: str, query: str):
+        self.method = method
+        self.query = query
+
+
+class _CapturingExecutor:
+    """Stop a generated query function right before it talks to the server."""
+
+    def __getattr__(self, method: str) -> Any:
+        async def capture(query: str, *args: Any, **kwargs: Any) -> Any:
+            raise _Captured(method, query)
+
+        return capture
+
+
+async def capture_query(fn: Any) -> tuple[str, str]:
+    """Return the executor method and exact query text a function sends."""
+    fn = inspect.unwrap(fn)
+    params = inspect.signature(fn).parameters.values()
+    kwargs = {p.name: None for p in params if p.kind is p.KEYWORD_ONLY}
+    try:
+        await fn(_CapturingExecutor(), **kwargs)
+    except _Captured as captured:
+        return captured.method, captured.query
+    raise RuntimeError(f"{fn.__name__}() didn't send a query")
+
+
+async def warm_up(
+    clients: Iterable[edgedb.AsyncIOClient], raw_json: bool = False
+) -> None:
+    """Have the server compile every generated query ahead of the first request.
+
+    Describing a query compiles it and fetches its type descriptors without
+    running it, so queries that write are safe to warm up too. The exact
+    text sent by the generated functions is used, so that later requests hit
+    the same cache entries.
+    """
+    formats = [OutputFormat.BINARY]
+    if raw_json:
+        formats.append(OutputFormat.JSON)
+
+    clients = list(clients)
+    for module, name in iter_query_functions():
+        method, query = await capture_query(getattr(module, name))
+        start = time.perf_counter()
+        try:
+            for client in clients:
+                for output_format in formats:
+                    # There is no public API to prepare a query; this is what
+                    # `edgedb-py` uses to introspect queries.
+                    await client._describe_query(
+                        query,
+                        output_format=output_format,
+                        expect_one=method.startswith(
+                            ("query_single", "query_required_single")
+                        ),
+                    )
+        except edgedb.EdgeDBError:
+            logger.exception("Failed to warm up query %s", name)
+            continue
+        logger.info(
+            "Warmed up query %s in %.1f ms", name, (time.perf_counter() - start) * 1000
+        )
@@ -0,0 +1,199 @@
+"""Drive a mix of user and event requests through the app and report latency.
+
+Requests go through `make_app()` over an in-process ASGI transport, so no
+server or network is involved. By default the database is replaced by a
+`StubExecutor`: the numbers are then the app's own overhead, which can be
+compared with a run against a real database to tell the two apart.
+
+Run it from the project root after `make generate`:
+
+    $ python -m benchmarks.load --concurrency 32 --requests 10000
+    $ python -m benchmarks.load --db --concurrency 32 --requests 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import random
+import statistics
+import time
+import uuid
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+from fastapi import FastAPI
+
+from app.config import Settings
+from app.main import make_app
+
+from .stub import StubExecutor
+
+Request = Callable[[httpx.AsyncClient, random.Random], Awaitable[None]]
+
+
+################################
+# Request mix
+################################
+
+
+class Mix:
+    """Weighted requests against names known to exist."""
+
+    def __init__(self, user_names: list[str], event_names: list[str]):
+        self.user_names = user_names
+        self.event_names = event_names
+        self.requests: dict[str, tuple[int, Request]] = {
+            "GET /users": (2, self.get_users),
+            "GET /users?name": (4, self.get_user),
+            "GET /users?limit": (1, self.get_users_page),
+            "GET /events": (2, self.get_events),
+            "GET /events?name": (4, self.get_event),
+            "GET /events?limit": (1, self.get_events_page),
+            "POST+DELETE /users": (1, self.create_and_delete_user),
+        }
+
+    def choose(self, rng: random.Random) -> tuple[str, Request]:
+        (label,) = rng.choices(
+            list(self.requests), weights=[w for w, _ in self.requests.values()]
+        )
+        return label, self.requests[label][1]
+
+    async def get_users(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        (await client.get("/users")).raise_for_status()
+
+    async def get_user(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        name = rng.choice(self.user_names)
+        (await client.get("/users", params={"name": name})).raise_for_status()
+
+    async def get_users_page(
+        self, client: httpx.AsyncClient, rng: random.Random
+    ) -> None:
+        (await client.get("/users", params={"limit": 100})).raise_for_status()
+
+    async def get_events(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        (await client.get("/events")).raise_for_status()
+
+    async def get_event(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        name = rng.choice(self.event_names)
+        (await client.get("/events", params={"name": name})).raise_for_status()
+
+    async def get_events_page(
+        self, client: httpx.AsyncClient, rng: random.Random
+    ) -> None:
+        (await client.get("/events", params={"limit": 100})).raise_for_status()
+
+    async def create_and_delete_user(
+        self, client: httpx.AsyncClient, rng: random.Random
+    ) -> None:
+        name = f"bench-{uuid.uuid4().hex[:16]}"
+        (await client.post("/users", json={"name": name})).raise_for_status()
+        (await client.delete("/users", params={"name": name})).raise_for_status()
+
+
+async def discover_mix(client: httpx.AsyncClient) -> Mix:
+    """Pick the names to read from what is actually there."""
+    users = (await client.get("/users", params={"limit": 100})).raise_for_status()
+    events = (await client.get("/events", params={"limit": 100})).raise_for_status()
+    user_names = [user["name"] for user in users.json()]
+    event_names = [event["name"] for event in events.json()]
+    if not user_names or not event_names:
+        raise SystemExit("The database needs at least one user and one event.")
+    return Mix(user_names, event_names)
+
+
+################################
+# Running
+################################
+
+
+@contextlib.asynccontextmanager
+async def bench_app(
+    settings: Settings, db: bool, rows: int, latency: float
+) -> AsyncIterator[FastAPI]:
+    app = make_app(settings)
+    if db:
+        # Connects both pools, like the server does on startup.
+        async with app.router.lifespan_context(app):
+            yield app
+    else:
+        # The lifespan isn't run by the transport, so no connection is attempted.
+        executor = await StubExecutor.create(rows, latency)
+        app.state.edgedb = app.state.edgedb_read = executor
+        yield app
+
+
+async def run(
+    app: FastAPI, concurrency: int, requests: int, seed: int
+) -> tuple[float, dict[str, list[float]]]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        mix = await discover_mix(client)
+        latencies: dict[str, list[float]] = collections.defaultdict(list)
+        remaining = iter(range(requests))
+
+        async def worker(rng: random.Random) -> None:
+            for _ in remaining:
+                label, request = mix.choose(rng)
+                start = time.perf_counter()
+                await request(client, rng)
+                latencies[label].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(random.Random(seed + i)) for i in range(concurrency))
+        )
+        return time.perf_counter() - start, latencies
+
+
+def percentiles(samples: list[float]) -> tuple[float, float, float]:
+    if len(samples) < 2:
+        return (samples[0],) * 3 if samples else (0.0, 0.0, 0.0)
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def report(elapsed: float, latencies: dict[str, list[float]]) -> None:
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests in {elapsed:.2f} s: {total / elapsed:.0f} req/s")
+    print(f"{'request':<22} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = sorted(latencies.items())
+    rows.append(("all", [s for samples in latencies.values() for s in samples]))
+    for label, samples in rows:
+        p50, p95, p99 = percentiles(samples)
+        print(
+            f"{label:<22} {len(samples):>7} {p50 * 1000:>8.2f} "
+            f"{p95 * 1000:>8.2f} {p99 * 1000:>8.2f}"
+        )
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings = Settings.from_env()
+    if args.raw_json:
+        settings = dataclasses.replace(settings, raw_json=True)
+    async with bench_app(settings, args.db, args.rows, args.latency / 1000) as app:
+        elapsed, latencies = await run(app, args.concurrency, args.requests, args.seed)
+    report(elapsed, latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument(
+        "--db", action="store_true", help="use the project's database instead of stubs"
+    )
+    parser.add_argument(
+        "--rows", type=int, default=100, help="rows per stubbed list query"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="stubbed latency per query, in ms"
+    )
+    parser.add_argument("--raw-json", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
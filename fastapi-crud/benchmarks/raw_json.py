@@ -0,0 +1,63 @@
+"""Measure the CPU cost of GET /users with and without raw JSON responses.
+
+The database is replaced by an executor that hands back pre-built results,
+so the numbers only cover what happens inside the app: decoding aside,
+that's FastAPI's response validation and JSON encoding.
+
+Run it from the project root after `make generate`:
+
+    $ python -m benchmarks.raw_json --rows 1000 10000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.config import Settings
+from app.main import make_app
+
+from .stub import StubExecutor
+
+
+async def cpu_per_request(
+    executor: StubExecutor, raw_json: bool, requests: int
+) -> float:
+    app = make_app(Settings(raw_json=raw_json))
+    # The lifespan isn't run by the transport, so no connection is attempted.
+    app.state.edgedb = app.state.edgedb_read = executor
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        # Warm up routing and schema caches before measuring.
+        (await client.get("/users")).raise_for_status()
+
+        start = time.process_time()
+        for _ in range(requests):
+            (await client.get("/users")).raise_for_status()
+        return (time.process_time() - start) / requests
+
+
+async def main(rows: list[int], requests: int) -> None:
+    print(f"{'rows':>8} {'decoded ms':>12} {'raw ms':>10} {'saved':>7}")
+    for n in rows:
+        executor = await StubExecutor.create(n)
+        decoded = await cpu_per_request(executor, raw_json=False, requests=requests)
+        raw = await cpu_per_request(executor, raw_json=True, requests=requests)
+        print(
+            f"{n:>8} {decoded * 1000:>12.2f} {raw * 1000:>10.2f} "
+            f"{1 - raw / decoded:>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.requests))
@@ -0,0 +1,146 @@
+"""An executor that replays canned query results instead of using a database."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import datetime
+import json
+import uuid
+from typing import Any
+
+from app.queries import create_user_async_edgeql as create_user_qry
+from app.queries import delete_user_async_edgeql as delete_user_qry
+from app.queries import get_data_version_async_edgeql as get_data_version_qry
+from app.queries import get_event_by_name_async_edgeql as get_event_by_name_qry
+from app.queries import get_events_async_edgeql as get_events_qry
+from app.queries import get_events_first_page_async_edgeql as get_events_first_page_qry
+from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from app.queries import get_users_async_edgeql as get_users_qry
+from app.queries import get_users_first_page_async_edgeql as get_users_first_page_qry
+from app.warmup import capture_query
+
+
+def _to_json(result: Any) -> str:
+    if isinstance(result, list):
+        data: Any = [dataclasses.asdict(row) for row in result]
+    else:
+        data = dataclasses.asdict(result)
+    return json.dumps(data, default=str)
+
+
+class StubExecutor:
+    """Answer the generated queries with pre-built result dataclasses.
+
+    Results are looked up by the exact query text, so every call of the same
+    query gets the same rows whatever its arguments. `latency` seconds are
+    slept per query to stand in for a database round trip.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._results: dict[str, Any] = {}
+        self._results_json: dict[str, str] = {}
+
+    @classmethod
+    async def create(cls, rows: int, latency: float = 0.0) -> StubExecutor:
+        self = cls(latency)
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        users = [
+            get_users_qry.GetUsersResult(
+                id=uuid.uuid4(), name=f"User {i}", created_at=now
+            )
+            for i in range(rows)
+        ]
+        events = [
+            get_events_qry.GetEventsResult(
+                id=uuid.uuid4(),
+                name=f"Event {i}",
+                address="Address",
+                schedule=now,
+                host=get_events_qry.GetEventsResultHost(
+                    id=users[0].id, name=users[0].name
+                ),
+            )
+            for i in range(rows)
+        ]
+        user = dataclasses.asdict(users[0])
+        event = dataclasses.asdict(events[0])
+        event_host = get_event_by_name_qry.GetEventByNameResultHost(**event["host"])
+
+        await self.add(get_users_qry.get_users, users)
+        await self.add(
+            get_users_first_page_qry.get_users_first_page,
+            [
+                get_users_first_page_qry.GetUsersFirstPageResult(
+                    id=u.id, name=u.name, created_at=now
+                )
+                for u in users
+            ],
+        )
+        await self.add(
+            get_user_by_name_qry.get_user_by_name,
+            get_user_by_name_qry.GetUserByNameResult(**user),
+        )
+        await self.add(
+            create_user_qry.create_user,
+            create_user_qry.CreateUserResult(**user),
+        )
+        await self.add(
+            delete_user_qry.delete_user,
+            delete_user_qry.DeleteUserResult(**user),
+        )
+        await self.add(get_events_qry.get_events, events)
+        await self.add(
+            get_events_first_page_qry.get_events_first_page,
+            [
+                get_events_first_page_qry.GetEventsFirstPageResult(
+                    id=e.id,
+                    name=e.name,
+                    address=e.address,
+                    schedule=now,
+                    host=get_events_first_page_qry.GetEventsFirstPageResultHost(
+                        id=e.host.id, name=e.host.name
+                    ),
+                    created_at=now,
+                )
+                for e in events
+            ],
+        )
+        await self.add(
+            get_event_by_name_qry.get_event_by_name,
+            get_event_by_name_qry.GetEventByNameResult(**{**event, "host": event_host}),
+        )
+        await self.add(
+            get_data_version_qry.get_data_version,
+            get_data_version_qry.GetDataVersionResult(
+                id=uuid.uuid4(), users=rows, events=rows, modified_at=now
+            ),
+        )
+        return self
+
+    async def add(self, fn: Any, result: Any) -> None:
+        _, query = await capture_query(fn)
+        self._results[query] = result
+        self._results_json[query] = _to_json(result)
+
+    async def _reply(self, results: dict[str, Any], query: str) -> Any:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        try:
+            return results[query]
+        except KeyError:
+            raise LookupError(f"No canned result for query:\n{query}")
+
+    async def query(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._reply(self._results, query)
+
+    async def query_single(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._reply(self._results, query)
+
+    async def query_json(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._reply(self._results_json, query)
+
+    async def query_single_json(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._reply(self._results_json, query)
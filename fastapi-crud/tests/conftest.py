@@ -1,16 +1,78 @@
+import os
+import pathlib
+
 import edgedb
 import pytest
 from fastapi.testclient import TestClient
 
+from app.config import Settings
 from app.main import make_app
 
 
+ROOT = pathlib.Path(__file__).parent.parent
+
+# One database per pytest-xdist worker (or "main" without xdist), so that
+# workers can run in parallel without seeing each other's data.
+TEST_DATABASE = "edgedb_test_{worker}"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_database():
+    name = TEST_DATABASE.format(worker=os.environ.get("PYTEST_XDIST_WORKER", "main"))
+    create_test_database(name)
+    # Every client created by the app picks this up.
+    previous, os.environ["EDGEDB_DATABASE"] = os.environ.get("EDGEDB_DATABASE"), name
+    try:
+        yield name
+    finally:
+        if previous is None:
+            del os.environ["EDGEDB_DATABASE"]
+        else:
+            os.environ["EDGEDB_DATABASE"] = previous
+        drop_test_database(name)
+
+
+def create_test_database(name):
+    drop_test_database(name)
+    client = edgedb.create_client()
+    try:
+        client.execute(f"create database {name}")
+    finally:
+        client.close()
+
+    # `edgedb migrate` sends the migration files as they are, so do the same
+    # instead of shelling out to the CLI from every worker.
+    client = edgedb.create_client(database=name)
+    try:
+        for path in sorted((ROOT / "dbschema" / "migrations").glob("*.edgeql")):
+            client.execute(path.read_text())
+        client.execute((ROOT / "tests" / "fixture.edgeql").read_text())
+    finally:
+        client.close()
+
+
+def drop_test_database(name):
+    client = edgedb.create_client()
+    try:
+        client.execute(f"drop database {name}")
+    except edgedb.UnknownDatabaseError:
+        pass
+    finally:
+        client.close()
+
+
 @pytest.fixture
 def test_client():
     with TestClient(make_app()) as client:
         yield client
 
 
+@pytest.fixture
+def raw_json_test_client():
+    with TestClient(make_app(Settings(raw_json=True))) as client:
+        yield client
+
+
 @pytest.fixture
 def tx_test_client(mocker):
     mocker.patch("app.main.setup_edgedb", tx_setup_edgedb)
@@ -24,12 +86,14 @@ async def tx_setup_edgedb(app):
     await client.ensure_connected()
     async for tx in client.with_retry_options(edgedb.RetryOptions(0)).transaction():
         await tx.__aenter__()
-        app.state.edgedb = tx
+        # Reads must see the transaction's writes.
+        app.state.edgedb = app.state.edgedb_read = tx
         break
 
 
 async def tx_shutdown_edgedb(app):
     client, app.state.edgedb_client = app.state.edgedb_client, None
     tx, app.state.edgedb = app.state.edgedb, None
+    app.state.edgedb_read = None
     await tx.__aexit__(Exception, Exception(), None)
     await client.aclose()
@@ -0,0 +1,86 @@
+from app.cache import LRUCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_expiration():
+    timer = FakeTimer()
+    cache = LRUCache(maxsize=2, ttl=10, timer=timer)
+    cache.set("a", 1)
+    timer.now = 9
+    assert cache.get("a") == 1
+    timer.now = 10
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_disabled():
+    cache = LRUCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+async def test_get_or_load():
+    cache = LRUCache(maxsize=2, ttl=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return "value"
+
+    assert await cache.get_or_load("a", load) == "value"
+    assert await cache.get_or_load("a", load) == "value"
+    assert len(calls) == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+async def test_get_or_load_skips_empty_results():
+    cache = LRUCache(maxsize=2, ttl=60)
+
+    async def load():
+        return None
+
+    assert await cache.get_or_load("a", load) is None
+    assert len(cache) == 0
+
+
+async def test_get_or_load_racing_invalidation():
+    cache = LRUCache(maxsize=2, ttl=60)
+
+    async def load():
+        # A write lands while the read is in flight.
+        cache.invalidate("a")
+        return "stale"
+
+    assert await cache.get_or_load("a", load) == "stale"
+    assert cache.get("a") is None
+
+
+def test_invalidate_where():
+    cache = LRUCache(maxsize=3, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    cache.invalidate_where(lambda value: value % 2 == 1)
+    assert len(cache) == 1
+    assert cache.get("b") == 2
+    assert cache.stats.invalidations == 2
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.coalescing import SingleFlight
+
+
+async def test_concurrent_calls_are_coalesced():
+    flights = SingleFlight()
+    calls = []
+    release = asyncio.Event()
+
+    async def load():
+        calls.append(1)
+        await release.wait()
+        return "value"
+
+    waiters = [asyncio.ensure_future(flights.do("a", load)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*waiters) == ["value"] * 10
+    assert len(calls) == 1
+    assert (flights.stats.executed, flights.stats.coalesced) == (1, 9)
+    assert len(flights) == 0
+
+
+async def test_errors_are_shared():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flights.do("a", load), flights.do("a", load), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.stats.executed == 1
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "value"
+
+    first = asyncio.ensure_future(flights.do("a", load))
+    second = asyncio.ensure_future(flights.do("a", load))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_forget_all_starts_a_fresh_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    results = iter(["stale", "fresh"])
+
+    async def load():
+        value = next(results)
+        await release.wait()
+        return value
+
+    before = asyncio.ensure_future(flights.do("a", load))
+    await asyncio.sleep(0)
+    flights.forget_all()
+    after = asyncio.ensure_future(flights.do("a", load))
+    await asyncio.sleep(0)
+    release.set()
+    assert (await before, await after) == ("stale", "fresh")
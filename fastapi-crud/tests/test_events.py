@@ -1,7 +1,6 @@
 """
-Currently these tests use the same database that the app uses.
-In a real application, you'd want to patch the 'client' to use a
-separate database.
+These tests run against a database of their own, one per test worker.
+See `test_database` in `conftest.py`.
 
 """
 
@@ -9,7 +8,18 @@ import datetime
 import uuid
 from http import HTTPStatus
 
+import edgedb
+import pytest
+
+from app.pagination import decode_cursor, encode_cursor
+from app.queries import create_events_async_edgeql as create_events_qry
+from app.queries import get_event_changes_async_edgeql as get_event_changes_qry
 from app.queries import get_events_async_edgeql as get_events_qry
+from app.queries import (
+    get_events_by_schedule_async_edgeql as get_events_by_schedule_qry,
+)
+from app.queries import get_events_first_page_async_edgeql as get_events_first_page_qry
+from app.queries import update_events_async_edgeql as update_events_qry
 
 
 def test_get_events(test_client):
@@ -76,6 +86,190 @@ def test_get_events_with_multiple_events(mocker, test_client):
     assert response.json()[1]["name"] == event_2_name
 
 
+def test_get_events_paginated(mocker, test_client):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    mocker.patch(
+        "app.events.get_events_first_page_qry.get_events_first_page",
+        return_value=[
+            get_events_first_page_qry.GetEventsFirstPageResult(
+                id=uuid.uuid4(),
+                name=f"Test {i}",
+                address="Address",
+                host=get_events_first_page_qry.GetEventsFirstPageResultHost(
+                    id=uuid.uuid4(), name="Test Host"
+                ),
+                schedule=now,
+                created_at=now + datetime.timedelta(seconds=i),
+            )
+            for i in range(2)
+        ],
+    )
+    response = test_client.get("/events", params={"limit": 1})
+    assert response.status_code == HTTPStatus.OK
+    assert [e["name"] for e in response.json()] == ["Test 0"]
+    assert "X-Next-Cursor" in response.headers
+
+
+def test_get_events_by_schedule(mocker, test_client):
+    schedule = datetime.datetime(2010, 12, 28, tzinfo=datetime.timezone.utc)
+    get_events_by_schedule = mocker.patch(
+        "app.events.get_events_by_schedule_qry.get_events_by_schedule",
+        return_value=[
+            get_events_by_schedule_qry.GetEventsByScheduleResult(
+                id=uuid.uuid4(),
+                name="Test",
+                address="Address",
+                host=None,
+                schedule=schedule,
+            )
+        ],
+    )
+    response = test_client.get("/events", params={"from": "2010-12-27T00:00:00Z"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()[0]["name"] == "Test"
+    kwargs = get_events_by_schedule.call_args.kwargs
+    assert kwargs["from_schedule"] == schedule - datetime.timedelta(days=1)
+    assert kwargs["to_schedule"].year == 9999
+
+
+def test_get_events_by_schedule_desc(mocker, test_client):
+    get_events_by_schedule_desc = mocker.patch(
+        "app.events.get_events_by_schedule_desc_qry.get_events_by_schedule_desc",
+        return_value=[],
+    )
+    response = test_client.get(
+        "/events", params={"to": "2010-12-27T00:00:00Z", "order": "desc"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert get_events_by_schedule_desc.call_count == 1
+
+
+def test_get_events_by_schedule_naive_datetime(test_client):
+    response = test_client.get("/events", params={"from": "2010-12-27T00:00:00"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"from": "2010-12-27T00:00:00Z", "limit": 2},
+        {"to": "2010-12-27T00:00:00Z", "after": "cursor"},
+        {"order": "desc"},
+        {"name": "Test", "order": "asc"},
+    ],
+)
+def test_get_events_unsupported_combination(test_client, params):
+    response = test_client.get("/events", params=params)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def event_changes(upserted=(), deleted=()):
+    return get_event_changes_qry.GetEventChangesResult(
+        id=None,
+        upserted=[
+            get_event_changes_qry.GetEventChangesResultUpserted(
+                id=uuid.uuid4(),
+                name=name,
+                address="Address",
+                host=None,
+                schedule=None,
+                created_at=created_at,
+                modified_at=modified_at,
+            )
+            for name, created_at, modified_at in upserted
+        ],
+        deleted=[
+            get_event_changes_qry.GetEventChangesResultDeleted(
+                id=uuid.uuid4(),
+                event_id=uuid.uuid4(),
+                name=name,
+                deleted_at=deleted_at,
+            )
+            for name, deleted_at in deleted
+        ],
+    )
+
+
+def test_get_event_changes(mocker, test_client):
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+    earlier = since - datetime.timedelta(seconds=1)
+    later = since + datetime.timedelta(seconds=1)
+    get_event_changes = mocker.patch(
+        "app.events.get_event_changes_qry.get_event_changes",
+        return_value=event_changes(
+            upserted=[("Old", earlier, later), ("New", later, later)],
+            deleted=[("Gone", later)],
+        ),
+    )
+    response = test_client.get(
+        "/events/changes", params={"since": since.isoformat()}
+    )
+    assert response.status_code == HTTPStatus.OK
+    changes = response.json()
+    assert [e["name"] for e in changes["inserted"]] == ["New"]
+    assert [e["name"] for e in changes["updated"]] == ["Old"]
+    assert [e["name"] for e in changes["deleted"]] == ["Gone"]
+    assert decode_cursor(changes["cursor"])[0] == later
+    assert not changes["has_more"]
+    assert get_event_changes.call_args.kwargs["after_time"] == since
+
+
+def test_get_event_changes_paged(mocker, test_client):
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+    times = [since + datetime.timedelta(seconds=i) for i in range(3)]
+    mocker.patch(
+        "app.events.get_event_changes_qry.get_event_changes",
+        return_value=event_changes(
+            upserted=[("First", times[0], times[0]), ("Third", times[2], times[2])],
+            deleted=[("Second", times[1])],
+        ),
+    )
+    response = test_client.get(
+        "/events/changes", params={"since": since.isoformat(), "limit": 2}
+    )
+    assert response.status_code == HTTPStatus.OK
+    changes = response.json()
+    assert [e["name"] for e in changes["inserted"]] == ["First"]
+    assert [e["name"] for e in changes["deleted"]] == ["Second"]
+    assert decode_cursor(changes["cursor"])[0] == times[1]
+    assert changes["has_more"]
+
+
+def test_get_event_changes_none(mocker, test_client):
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+    mocker.patch(
+        "app.events.get_event_changes_qry.get_event_changes",
+        return_value=event_changes(),
+    )
+    get_latest_change = mocker.patch(
+        "app.events.get_latest_change_qry.get_latest_event_change"
+    )
+    response = test_client.get(
+        "/events/changes", params={"since": since.isoformat()}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["inserted"] == []
+    assert decode_cursor(response.json()["cursor"])[0] == since
+    assert get_latest_change.call_count == 0
+
+
+def test_get_event_changes_forgotten(test_client):
+    since = datetime.datetime(2010, 12, 27, tzinfo=datetime.timezone.utc)
+    response = test_client.get(
+        "/events/changes", params={"since": since.isoformat()}
+    )
+    assert response.status_code == HTTPStatus.GONE
+
+
+def test_get_event_changes_since_and_after(test_client):
+    since = datetime.datetime.now(datetime.timezone.utc)
+    response = test_client.get(
+        "/events/changes",
+        params={"since": since.isoformat(), "after": encode_cursor(since, uuid.uuid4())},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 def test_post_event(tx_test_client):
     response = tx_test_client.post(
         "/events",
@@ -88,3 +282,93 @@ def test_post_event(tx_test_client):
     )
     assert response.status_code == HTTPStatus.CREATED
     assert response.json()["name"] == "test"
+
+
+def test_post_events_bulk(mocker, test_client):
+    create_events = mocker.patch(
+        "app.events.create_events_qry.create_events",
+        return_value=[
+            create_events_qry.CreateEventsResult(
+                id=uuid.uuid4(),
+                name="Test 1",
+                address="Address",
+                host=create_events_qry.CreateEventsResultHost(
+                    id=uuid.uuid4(), name="Test Host"
+                ),
+                schedule=datetime.datetime.now(),
+            )
+        ],
+    )
+    event = {
+        "address": "Address",
+        "host_name": "Test Host",
+        "schedule": "2010-12-27T23:59:59-07:00",
+    }
+    response = test_client.post(
+        "/events/bulk",
+        json=[
+            {**event, "name": "Test 1"},
+            {**event, "name": "Test 2"},
+            {**event, "name": "Test 1"},
+            {**event, "name": "Test 3", "schedule": "tomorrow"},
+            {**event, "name": "Test 4", "schedule": "20240101T000000+00:00"},
+        ],
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert create_events.call_count == 1
+    assert [e["name"] for e in response.json()["created"]] == ["Test 1"]
+    assert [e["index"] for e in response.json()["errors"]] == [1, 2, 3, 4]
+
+
+def test_post_events_bulk_invalid_datetime(mocker, test_client):
+    mocker.patch(
+        "app.events.create_events_qry.create_events",
+        side_effect=edgedb.errors.InvalidValueError("invalid input"),
+    )
+    response = test_client.post(
+        "/events/bulk",
+        json=[
+            {
+                "name": "Test 1",
+                "address": "Address",
+                "host_name": "Test Host",
+                "schedule": "2010-12-27T23:59:59-07:00",
+            }
+        ],
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_put_events_bulk(mocker, test_client):
+    update_events = mocker.patch(
+        "app.events.update_events_qry.update_events",
+        return_value=update_events_qry.UpdateEventsResult(
+            id=None,
+            updated=[
+                update_events_qry.UpdateEventsResultUpdated(
+                    id=uuid.uuid4(),
+                    name="New 1",
+                    address="Address",
+                    host=None,
+                    schedule=datetime.datetime.now(),
+                )
+            ],
+            taken=["Taken"],
+        ),
+    )
+    response = test_client.put(
+        "/events/bulk",
+        json=[
+            {"current_name": "Test 1", "name": "New 1"},
+            {"current_name": "Test 2", "name": "New 2"},
+            {"current_name": "New 1", "name": "New 3"},
+            {"current_name": "Test 4", "name": "Taken"},
+        ],
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert update_events.call_count == 1
+    assert [e["name"] for e in response.json()["updated"]] == ["New 1"]
+    errors = response.json()["errors"]
+    assert [e["index"] for e in errors] == [1, 2, 3]
+    assert errors[0]["error"] == "Event 'Test 2' was not found."
+    assert errors[2]["error"] == "Event name 'Taken' already exists."
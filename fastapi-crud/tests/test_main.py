@@ -0,0 +1,30 @@
+import time
+from http import HTTPStatus
+
+
+def test_health_check(test_client):
+    # Not ready until the query warm-up running in the background is done.
+    for _ in range(100):
+        response = test_client.get("/health_check")
+        if response.status_code != HTTPStatus.SERVICE_UNAVAILABLE:
+            break
+        time.sleep(0.1)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"status": "Ok"}
+
+
+def test_pool_stats(test_client):
+    response = test_client.get("/pool_stats")
+    assert response.status_code == HTTPStatus.OK
+    for pool in ("read", "write"):
+        stats = response.json()[pool]
+        assert stats["in_use"] == stats["max_concurrency"] - stats["free"]
+
+
+def test_metrics(test_client):
+    test_client.get("/users")
+    response = test_client.get("/metrics")
+    assert response.status_code == HTTPStatus.OK
+    assert 'edgedb_query_duration_seconds_count{query="get_users"}' in response.text
+    assert 'http_request_duration_seconds_count{method="GET"' in response.text
+    assert 'edgedb_pool_connections{pool="read",state="in_use"}' in response.text
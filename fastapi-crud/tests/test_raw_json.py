@@ -0,0 +1,78 @@
+"""
+These tests run against a database of their own, one per test worker.
+See `test_database` in `conftest.py`.
+
+"""
+
+import datetime
+import time
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.main import make_app
+
+
+DATETIME_FIELDS = {"created_at", "schedule"}
+
+
+def sort_rows(body):
+    if isinstance(body, list):
+        return sorted(body, key=lambda row: row["name"])
+    return body
+
+
+def parse_datetimes(body):
+    # Raw JSON has the database's datetime format, not Pydantic's.
+    if isinstance(body, list):
+        return [parse_datetimes(item) for item in body]
+    if isinstance(body, dict):
+        return {
+            key: (
+                datetime.datetime.fromisoformat(value)
+                if key in DATETIME_FIELDS
+                else parse_datetimes(value)
+            )
+            for key, value in body.items()
+        }
+    return body
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/users", {}),
+        ("/users", {"name": "Mina Murray"}),
+        ("/users", {"include": "events"}),
+        ("/users", {"name": "Mina Murray", "include": "events"}),
+        ("/events", {}),
+        ("/events", {"name": "Resuscitation"}),
+        ("/events", {"from": "1889-01-01T00:00:00+00:00"}),
+    ],
+)
+def test_raw_json_matches_decoded(test_client, raw_json_test_client, path, params):
+    decoded = test_client.get(path, params=params)
+    raw = raw_json_test_client.get(path, params=params)
+    assert decoded.status_code == raw.status_code == HTTPStatus.OK
+    assert parse_datetimes(sort_rows(raw.json())) == parse_datetimes(
+        sort_rows(decoded.json())
+    )
+    rows = decoded.json() if isinstance(decoded.json(), list) else [decoded.json()]
+    assert rows and all("id" in row for row in rows)
+
+
+def test_snapshot_matches_decoded(test_client):
+    with TestClient(make_app(Settings(snapshot_max_age=60))) as snapshot_client:
+        snapshot = snapshot_client.app.state.event_snapshot
+        for _ in range(100):
+            if snapshot.current() is not None:
+                break
+            time.sleep(0.05)
+        response = snapshot_client.get("/events")
+
+    # Only snapshot responses vary by encoding.
+    assert "Accept-Encoding" in response.headers["vary"]
+    decoded = test_client.get("/events")
+    assert sort_rows(response.json()) == sort_rows(decoded.json())
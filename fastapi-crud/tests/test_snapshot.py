@@ -0,0 +1,145 @@
+import asyncio
+import gzip
+from http import HTTPStatus
+
+from fastapi import Request
+
+from app.snapshot import ResponseSnapshot, accepts_gzip
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (key.replace("_", "-").encode(), value.encode())
+                for key, value in headers.items()
+            ],
+        }
+    )
+
+
+async def settle(snapshot):
+    while snapshot._task is not None and not snapshot._task.done():
+        await asyncio.sleep(0)
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.8")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("deflate")
+    assert not accepts_gzip(None)
+
+
+async def test_serves_snapshot_until_stale():
+    timer = FakeTimer()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return '[{"name": "Event"}]'
+
+    snapshot = ResponseSnapshot(load, max_age=10, timer=timer)
+    assert snapshot.current() is None
+    await settle(snapshot)
+    assert snapshot.current().body == b'[{"name": "Event"}]'
+
+    timer.now = 11
+    assert snapshot.current() is None
+    await settle(snapshot)
+    assert snapshot.current() is not None
+    assert len(loads) == 2
+
+
+async def test_invalidate_hides_snapshot_until_rebuilt():
+    bodies = iter(["[1]", "[2]"])
+
+    async def load():
+        return next(bodies)
+
+    snapshot = ResponseSnapshot(load, max_age=60)
+    snapshot.refresh()
+    await settle(snapshot)
+    assert snapshot.current().body == b"[1]"
+
+    snapshot.invalidate()
+    assert snapshot.current() is None
+    await settle(snapshot)
+    assert snapshot.current().body == b"[2]"
+
+
+async def test_write_during_rebuild_triggers_another():
+    bodies = iter(["[1]", "[2]"])
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def load():
+        started.set()
+        await release.wait()
+        return next(bodies)
+
+    snapshot = ResponseSnapshot(load, max_age=60)
+    snapshot.refresh()
+    await started.wait()
+    snapshot.invalidate()
+    release.set()
+    await settle(snapshot)
+    assert snapshot.current().body == b"[2]"
+    assert snapshot.rebuilds == 2
+
+
+async def test_failed_rebuild_is_not_served():
+    async def load():
+        raise RuntimeError("connection lost")
+
+    snapshot = ResponseSnapshot(load, max_age=60)
+    snapshot.refresh()
+    await settle(snapshot)
+    assert snapshot.current() is None
+
+
+def test_disabled():
+    async def load():
+        raise AssertionError("should not load")
+
+    snapshot = ResponseSnapshot(load, max_age=0)
+    snapshot.invalidate()
+    assert snapshot.current() is None
+    assert not snapshot.snapshot()["fresh"]
+
+
+async def test_response_negotiates_gzip_and_etag():
+    async def load():
+        return "[]"
+
+    snapshot = ResponseSnapshot(load, max_age=60)
+    snapshot.refresh()
+    await settle(snapshot)
+    current = snapshot.current()
+
+    plain = current.response(make_request())
+    assert plain.body == b"[]"
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    compressed = current.response(make_request(accept_encoding="gzip"))
+    assert gzip.decompress(compressed.body) == b"[]"
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] != plain.headers["etag"]
+
+    not_modified = current.response(
+        make_request(accept_encoding="gzip", if_none_match=compressed.headers["etag"])
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert current.response(
+        make_request(if_none_match=compressed.headers["etag"])
+    ).status_code == HTTPStatus.OK
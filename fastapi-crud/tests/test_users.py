@@ -1,15 +1,24 @@
 """
-Currently these tests use the same database that the app uses.
-In a real application, you'd want to patch the 'client' to use a
-separate database.
+These tests run against a database of their own, one per test worker.
+See `test_database` in `conftest.py`.
 
 """
 
+import base64
 import datetime
+import json
 import uuid
 from http import HTTPStatus
 
+from app.queries import delete_user_async_edgeql as delete_user_qry
+from app.queries import delete_users_async_edgeql as delete_users_qry
+from app.queries import get_data_version_async_edgeql as get_data_version_qry
+from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
 from app.queries import get_users_async_edgeql as get_users_qry
+from app.queries import get_users_first_page_async_edgeql as get_users_first_page_qry
+from app.queries import get_users_page_async_edgeql as get_users_page_qry
+from app.queries import get_users_with_events_async_edgeql as get_users_with_events_qry
+from app.queries import update_users_async_edgeql as update_users_qry
 
 
 def test_get_users(test_client):
@@ -17,6 +26,19 @@ def test_get_users(test_client):
     assert response.status_code == HTTPStatus.OK
 
 
+def test_get_users_raw_json(raw_json_test_client):
+    response = raw_json_test_client.get("/users")
+    assert response.status_code == HTTPStatus.OK
+    assert "ETag" in response.headers
+    assert response.headers["content-type"] == "application/json"
+    assert isinstance(response.json(), list)
+
+
+def test_get_user_raw_json_not_found(raw_json_test_client):
+    response = raw_json_test_client.get("/users", params={"name": "Nobody"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 def test_get_users_with_single_user(mocker, test_client):
     user_name = "Test"
     mocker.patch(
@@ -52,7 +74,248 @@ def test_get_users_with_multiple_users(mocker, test_client):
     assert response.json()[1]["name"] == user_2_name
 
 
+def test_get_users_not_modified(mocker, test_client):
+    mocker.patch(
+        "app.etag.get_data_version_qry.get_data_version",
+        return_value=get_data_version_qry.GetDataVersionResult(
+            id=None,
+            users=1,
+            events=0,
+            modified_at=datetime.datetime.now(datetime.timezone.utc),
+        ),
+    )
+    get_users = mocker.patch("app.users.get_users_qry.get_users", return_value=[])
+    response = test_client.get("/users")
+    assert response.status_code == HTTPStatus.OK
+    etag = response.headers["ETag"]
+
+    response = test_client.get("/users", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    assert get_users.call_count == 1
+
+    response = test_client.get(
+        "/users", params={"include": "events"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
 def test_post_user(tx_test_client):
     response = tx_test_client.post("/users", json={"name": "test"})
     assert response.status_code == HTTPStatus.CREATED
     assert response.json()["name"] == "test"
+
+
+def test_get_users_paginated(mocker, test_client):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    get_users_first_page = mocker.patch(
+        "app.users.get_users_first_page_qry.get_users_first_page",
+        return_value=[
+            get_users_first_page_qry.GetUsersFirstPageResult(
+                id=uuid.uuid4(),
+                name=f"Test {i}",
+                created_at=now + datetime.timedelta(seconds=i),
+            )
+            for i in range(3)
+        ],
+    )
+    get_users_page = mocker.patch(
+        "app.users.get_users_page_qry.get_users_page", return_value=[]
+    )
+    response = test_client.get("/users", params={"limit": 2})
+    assert response.status_code == HTTPStatus.OK
+    assert [u["name"] for u in response.json()] == ["Test 0", "Test 1"]
+    assert get_users_first_page.call_args.kwargs == {"limit": 3}
+    assert get_users_page.call_count == 0
+
+    cursor = response.headers["X-Next-Cursor"]
+    test_client.get("/users", params={"limit": 2, "after": cursor})
+    assert get_users_page.call_args.kwargs["after_created_at"] == now + (
+        datetime.timedelta(seconds=1)
+    )
+
+
+def test_get_users_last_page(mocker, test_client):
+    mocker.patch(
+        "app.users.get_users_first_page_qry.get_users_first_page",
+        return_value=[
+            get_users_first_page_qry.GetUsersFirstPageResult(
+                id=uuid.uuid4(), name="Test", created_at=datetime.datetime.now()
+            )
+        ],
+    )
+    response = test_client.get("/users", params={"limit": 2})
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_users_invalid_cursor(test_client):
+    response = test_client.get("/users", params={"after": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_get_users_naive_cursor(test_client):
+    cursor = base64.urlsafe_b64encode(f"2024-01-01T00:00:00|{uuid.uuid4()}".encode())
+    response = test_client.get("/users", params={"after": cursor.decode()})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_export_users(mocker, test_client):
+    now = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    users = [
+        get_users_page_qry.GetUsersPageResult(
+            id=uuid.uuid4(), name=f"Test {i}", created_at=now
+        )
+        for i in range(3)
+    ]
+    mocker.patch(
+        "app.users.get_users_first_page_qry.get_users_first_page",
+        return_value=users[:2],
+    )
+    get_users_page = mocker.patch(
+        "app.users.get_users_page_qry.get_users_page", return_value=users[2:]
+    )
+    response = test_client.get("/users/export", params={"page_size": 2})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [
+        "Test 0",
+        "Test 1",
+        "Test 2",
+    ]
+    assert get_users_page.call_args.kwargs["after_id"] == users[1].id
+    # Serialized like the JSON responses are.
+    assert json.loads(lines[0])["created_at"] == "2024-01-02T03:04:05Z"
+    assert json.loads(lines[0])["id"] == str(users[0].id)
+
+
+def test_get_user_by_name_is_cached(mocker, test_client):
+    get_user_by_name = mocker.patch(
+        "app.users.get_user_by_name_qry.get_user_by_name",
+        return_value=get_user_by_name_qry.GetUserByNameResult(
+            id=uuid.uuid4(), name="Test", created_at=datetime.datetime.now()
+        ),
+    )
+    for _ in range(3):
+        response = test_client.get("/users", params={"name": "Test"})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["name"] == "Test"
+    assert get_user_by_name.call_count == 1
+
+    stats = test_client.get("/cache_stats").json()["users"]
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_delete_user_invalidates_cache(mocker, test_client):
+    get_user_by_name = mocker.patch(
+        "app.users.get_user_by_name_qry.get_user_by_name",
+        return_value=get_user_by_name_qry.GetUserByNameResult(
+            id=uuid.uuid4(), name="Test", created_at=datetime.datetime.now()
+        ),
+    )
+    mocker.patch(
+        "app.users.delete_user_qry.delete_user",
+        return_value=delete_user_qry.DeleteUserResult(
+            id=uuid.uuid4(), name="Test", created_at=datetime.datetime.now()
+        ),
+    )
+    test_client.get("/users", params={"name": "Test"})
+    test_client.delete("/users", params={"name": "Test"})
+    test_client.get("/users", params={"name": "Test"})
+    assert get_user_by_name.call_count == 2
+
+
+def test_get_users_with_events(mocker, test_client):
+    mocker.patch(
+        "app.users.get_users_with_events_qry.get_users_with_events",
+        return_value=[
+            get_users_with_events_qry.GetUsersWithEventsResult(
+                id=uuid.uuid4(),
+                name="Test",
+                created_at=datetime.datetime.now(),
+                events=[
+                    get_users_with_events_qry.GetUsersWithEventsResultEventsItem(
+                        id=uuid.uuid4(),
+                        name="Test Event",
+                        address="Address",
+                        schedule=datetime.datetime.now(),
+                    )
+                ],
+            )
+        ],
+    )
+    response = test_client.get("/users", params={"include": "events"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()[0]["events"][0]["name"] == "Test Event"
+
+
+def test_get_user_with_events_not_found(mocker, test_client):
+    mocker.patch(
+        "app.users.get_user_with_events_by_name_qry.get_user_with_events_by_name",
+        return_value=None,
+    )
+    response = test_client.get(
+        "/users", params={"name": "Nobody", "include": "events"}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_put_users_bulk(mocker, test_client):
+    update_users = mocker.patch(
+        "app.users.update_users_qry.update_users",
+        return_value=update_users_qry.UpdateUsersResult(
+            id=None,
+            updated=[
+                update_users_qry.UpdateUsersResultUpdated(
+                    id=uuid.uuid4(),
+                    name="New 1",
+                    created_at=datetime.datetime.now(datetime.timezone.utc),
+                )
+            ],
+            taken=["Taken"],
+        ),
+    )
+    response = test_client.put(
+        "/users/bulk",
+        json=[
+            {"current_name": "Test 1", "name": "New 1"},
+            {"current_name": "Test 2", "name": "Taken"},
+            {"current_name": "Test 3", "name": "New 1"},
+        ],
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert update_users.call_count == 1
+    assert [u["name"] for u in response.json()["updated"]] == ["New 1"]
+    errors = response.json()["errors"]
+    assert [e["index"] for e in errors] == [1, 2]
+    assert errors[0]["error"] == "Username 'Taken' already exists."
+    assert errors[1]["error"] == "Username 'New 1' appears more than once."
+
+
+def test_delete_users_bulk(mocker, test_client):
+    delete_users = mocker.patch(
+        "app.users.delete_users_qry.delete_users",
+        return_value=delete_users_qry.DeleteUsersResult(
+            id=None,
+            deleted=[
+                delete_users_qry.DeleteUsersResultDeleted(
+                    id=uuid.uuid4(),
+                    name="Test 1",
+                    created_at=datetime.datetime.now(datetime.timezone.utc),
+                )
+            ],
+            hosts=["Test 2"],
+        ),
+    )
+    response = test_client.request(
+        "DELETE", "/users/bulk", json=["Test 1", "Test 2", "Test 3"]
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert delete_users.call_count == 1
+    assert [u["name"] for u in response.json()["deleted"]] == ["Test 1"]
+    errors = response.json()["errors"]
+    assert [e["index"] for e in errors] == [1, 2]
+    assert errors[0]["error"] == "User attached to an event. Cannot delete."
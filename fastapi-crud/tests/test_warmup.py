@@ -0,0 +1,38 @@
+from edgedb.protocol.protocol import OutputFormat
+
+from app.generated import iter_query_functions
+from app.queries import get_user_by_name_async_edgeql as get_user_by_name_qry
+from app.queries import get_users_async_edgeql as get_users_qry
+from app.warmup import capture_query, warm_up
+
+
+class DescribingClient:
+    def __init__(self):
+        self.described = []
+
+    async def _describe_query(self, query, *, output_format, expect_one):
+        self.described.append((query, output_format, expect_one))
+
+
+async def test_capture_query():
+    method, query = await capture_query(get_users_qry.get_users)
+    assert method == "query"
+    assert "select User" in query
+
+    method, query = await capture_query(get_user_by_name_qry.get_user_by_name)
+    assert method == "query_single"
+    assert "$name" in query
+
+
+async def test_warm_up_describes_every_query():
+    client = DescribingClient()
+    await warm_up([client])
+    assert len(client.described) == len(list(iter_query_functions()))
+    assert {f for _, f, _ in client.described} == {OutputFormat.BINARY}
+
+
+async def test_warm_up_raw_json():
+    client = DescribingClient()
+    await warm_up([client], raw_json=True)
+    assert len(client.described) == 2 * len(list(iter_query_functions()))
+    assert OutputFormat.JSON in {f for _, f, _ in client.described}
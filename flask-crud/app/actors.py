@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-import json
 from http import HTTPStatus
+from typing import Any
 
 import edgedb
-from flask import Blueprint, request
+from flask import Blueprint, Response, request
+
+from app.db import get_client, like_prefix
+from app.pagination import page_args, page_query
+from app.projection import ACTOR_FIELDS, DEFAULT_ACTOR_SHAPE, compile_shape
+from app.raw_json import json_response, result_response
 
 actor = Blueprint("actor", __name__)
-client = edgedb.create_client()
 
 ################################
 # Get actors
@@ -15,25 +19,45 @@ client = edgedb.create_client()
 
 
 @actor.route("/actors", methods=["GET"])
-def get_actors() -> tuple[dict, int]:
+def get_actors() -> Response | tuple[dict, int]:
     filter_name = request.args.get("filter_name")
+    name_prefix = request.args.get("name_prefix")
 
-    if not filter_name:
-        actors = client.query_json(
-            """
-            SELECT Actor {name, age, height}
-            """
+    if filter_name and name_prefix:
+        return {
+            "error": "Only one of 'filter_name' and 'name_prefix' can be provided."
+        }, HTTPStatus.BAD_REQUEST
+
+    try:
+        shape = compile_shape(
+            request.args.get("fields"), ACTOR_FIELDS, DEFAULT_ACTOR_SHAPE
         )
+        page = page_args(request.args)
+    except ValueError as e:
+        return {"error": str(e)}, HTTPStatus.BAD_REQUEST
+
+    args: dict[str, Any] = {}
+    if filter_name:
+        condition = ".name=<str>$filter_name"
+        args["filter_name"] = filter_name
+    elif name_prefix:
+        # Case-insensitive, matching the index on str_lower(.name).
+        condition = "str_lower(.name) LIKE str_lower(<str>$pattern)"
+        args["pattern"] = like_prefix(name_prefix)
     else:
-        actors = client.query_json(
-            """
-            SELECT Actor {name, age, height} FILTER .name=<str>$filter_name
-            """,
-            filter_name=filter_name,
+        condition = "true"
+
+    if page is not None:
+        return json_response(
+            get_client().query_single_json(
+                page_query("Actor", shape, condition, after="after_id" in page),
+                **page,
+                **args,
+            )
         )
 
-    response_payload = {"result": json.loads(actors)}
-    return response_payload, HTTPStatus.OK
+    actors = get_client().query_json(f"SELECT Actor {shape} FILTER {condition}", **args)
+    return result_response(actors)
 
 
 ################################
@@ -42,7 +66,7 @@ def get_actors() -> tuple[dict, int]:
 
 
 @actor.route("/actors", methods=["POST"])
-def post_actor() -> tuple[dict, int]:
+def post_actor() -> Response | tuple[dict, int]:
     incoming_payload = request.json
 
     # Exception handling.
@@ -70,7 +94,7 @@ def post_actor() -> tuple[dict, int]:
             }, HTTPStatus.BAD_REQUEST
 
     # Save data to db.
-    actor = client.query_single_json(
+    actor = get_client().query_single_json(
         """
         WITH name:=<str>$name, age:=<optional int16>$age,
             height:=<optional int16>$height
@@ -82,8 +106,7 @@ def post_actor() -> tuple[dict, int]:
         age=age,
         height=height,
     )
-    response_payload = {"result": json.loads(actor)}
-    return response_payload, HTTPStatus.CREATED
+    return result_response(actor, HTTPStatus.CREATED)
 
 
 ################################
@@ -92,7 +115,7 @@ def post_actor() -> tuple[dict, int]:
 
 
 @actor.route("/actors", methods=["PUT"])
-def put_actors() -> tuple[dict, int]:
+def put_actors() -> Response | tuple[dict, int]:
     incoming_payload = request.json
     filter_name = request.args.get("filter_name")
 
@@ -121,7 +144,7 @@ def put_actors() -> tuple[dict, int]:
                 "error": "Field 'height' must between 0 and 300 cm."
             }, HTTPStatus.BAD_REQUEST
 
-    actors = client.query_json(
+    actors = get_client().query_json(
         """
         WITH filter_name:=<str>$filter_name, name:=<optional str>$name,
             age:=<optional int16>$age, height:=<optional int16>$height
@@ -138,8 +161,7 @@ def put_actors() -> tuple[dict, int]:
         age=age,
         height=height,
     )
-    response_payload = {"result": json.loads(actors)}
-    return response_payload, HTTPStatus.OK
+    return result_response(actors)
 
 
 ################################
@@ -148,14 +170,14 @@ def put_actors() -> tuple[dict, int]:
 
 
 @actor.route("/actors", methods=["DELETE"])
-def delete_actors() -> tuple[dict, int]:
+def delete_actors() -> Response | tuple[dict, int]:
     if not (filter_name := request.args.get("filter_name")):
         return {
             "error": "Query parameter 'filter_name' must be provided",
         }, HTTPStatus.BAD_REQUEST
 
     try:
-        actors = client.query_json(
+        actors = get_client().query_json(
             "SELECT (DELETE Actor FILTER .name=<str>$filter_name){name}",
             filter_name=filter_name,
         )
@@ -168,5 +190,4 @@ def delete_actors() -> tuple[dict, int]:
             HTTPStatus.BAD_REQUEST,
         )
 
-    response_payload = {"result": json.loads(actors)}
-    return response_payload, HTTPStatus.OK
+    return result_response(actors)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import edgedb
+from flask import current_app
+
+
+def create_client(max_concurrency: int | None) -> edgedb.Client:
+    # Each thread serves one request, and so needs at most one connection,
+    # at a time.
+    return edgedb.create_client(max_concurrency=max_concurrency)
+
+
+def get_client() -> edgedb.Client:
+    """The client of the current app, shared by all its blueprints."""
+    return current_app.extensions["edgedb"]
+
+
+def pool_stats(client: edgedb.Client) -> dict[str, int]:
+    max_concurrency, free_size = client.max_concurrency, client.free_size
+    return {
+        "max_concurrency": max_concurrency,
+        "free": free_size,
+        "in_use": max_concurrency - free_size,
+    }
+
+
+def like_prefix(prefix: str) -> str:
+    """Escape the wildcards of `LIKE` in `prefix` and match anything after it."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
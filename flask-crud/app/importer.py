@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import dataclasses
+import json
+import logging
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from typing import Any, Iterable, Iterator
+
+import edgedb
+from flask import Blueprint, Response, request
+
+from app.db import get_client
+
+importer = Blueprint("importer", __name__)
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+# Log the rate every this many rows.
+PROGRESS_LOG_INTERVAL = 100_000
+
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv"}
+CSV_COLUMNS = ["type", "name", "age", "height", "year", "actor_names"]
+
+# Names are not unique, so each batch updates the rows whose name it
+# matches and inserts the rest, reading both from the same snapshot.
+UPSERT_ACTORS = """
+    WITH items := json_array_unpack(<json>$data),
+        updated := (
+            FOR item IN items UNION (
+                UPDATE Actor FILTER .name = <str>item['name']
+                SET {
+                    age := <int16>json_get(item, 'age') ?? .age,
+                    height := <int16>json_get(item, 'height') ?? .height,
+                }
+            )
+        ),
+        inserted := (
+            FOR item IN (
+                SELECT items FILTER NOT EXISTS (
+                    SELECT Actor FILTER .name = <str>items['name']
+                )
+            ) UNION (
+                INSERT Actor {
+                    name := <str>item['name'],
+                    age := <int16>json_get(item, 'age'),
+                    height := <int16>json_get(item, 'height'),
+                }
+            )
+        ),
+    SELECT {updated := count(updated), inserted := count(inserted)};
+"""
+
+# The actors of the whole batch are looked up once, instead of once per movie.
+UPSERT_MOVIES = """
+    WITH items := json_array_unpack(<json>$data),
+        batch_actors := (
+            SELECT Actor FILTER .name IN array_unpack(<array<str>>$actor_names)
+        ),
+        updated := (
+            FOR item IN items UNION (
+                UPDATE Movie FILTER .name = <str>item['name']
+                SET {
+                    year := <int16>json_get(item, 'year') ?? .year,
+                    actors := (
+                        SELECT batch_actors FILTER .name IN
+                            <str>json_array_unpack(json_get(item, 'actor_names'))
+                    ) ?? .actors,
+                }
+            )
+        ),
+        inserted := (
+            FOR item IN (
+                SELECT items FILTER NOT EXISTS (
+                    SELECT Movie FILTER .name = <str>items['name']
+                )
+            ) UNION (
+                INSERT Movie {
+                    name := <str>item['name'],
+                    year := <int16>json_get(item, 'year'),
+                    actors := (
+                        SELECT batch_actors FILTER .name IN
+                            <str>json_array_unpack(json_get(item, 'actor_names'))
+                    ),
+                }
+            )
+        ),
+    SELECT {updated := count(updated), inserted := count(inserted)};
+"""
+
+
+class RowError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+
+
+class BatchError(ValueError):
+    def __init__(self, first_line: int, last_line: int, message: str):
+        super().__init__(f"Lines {first_line}-{last_line}: {message}")
+
+
+################################
+# Progress
+################################
+
+
+@dataclasses.dataclass
+class ImportProgress:
+    started_at: float = dataclasses.field(default_factory=time.monotonic)
+    # Rows read from the body, and rows whose batch has been committed.
+    rows: int = 0
+    committed: int = 0
+    inserted: int = 0
+    updated: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        seconds = time.monotonic() - self.started_at
+        return {
+            "rows": self.rows,
+            "committed": self.committed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(self.committed / seconds) if seconds else 0,
+        }
+
+
+# Imports in progress in this process, by id.
+_running: dict[str, ImportProgress] = {}
+_running_lock = threading.Lock()
+
+
+################################
+# Parsing
+################################
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, dict]]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            raise RowError(line_number, "Invalid JSON.")
+        if not isinstance(row, dict):
+            raise RowError(line_number, "Expected an object.")
+        yield line_number, row
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None or not {"type", "name"} <= set(reader.fieldnames):
+        raise RowError(1, f"The header must have the columns {CSV_COLUMNS}.")
+    for row in reader:
+        values: dict[str, Any] = {k: v for k, v in row.items() if k and v}
+        try:
+            for key in ("age", "height", "year"):
+                if key in values:
+                    values[key] = int(values[key])
+        except ValueError:
+            raise RowError(reader.line_num, f"Field '{key}' must be an integer.")
+        if "actor_names" in values:
+            values["actor_names"] = values["actor_names"].split(";")
+        yield reader.line_num, values
+
+
+def _check_int(line: int, row: dict, key: str, low: int, high: int) -> None:
+    value = row.get(key)
+    if value is None:
+        return
+    is_int = isinstance(value, int) and not isinstance(value, bool)
+    if not is_int or not low <= value <= high:
+        raise RowError(line, f"Field '{key}' must be between {low} and {high}.")
+
+
+def validate_row(line: int, row: dict) -> tuple[str, dict]:
+    """Check a row like the POST endpoints do, and keep the fields we know."""
+    name = row.get("name")
+    if not name or not isinstance(name, str):
+        raise RowError(line, "Field 'name' is required.")
+    if len(name) > 50:
+        raise RowError(line, "Field 'name' cannot be longer than 50 characters.")
+
+    kind = row.get("type")
+    if kind == "actor":
+        _check_int(line, row, "age", 0, 100)
+        _check_int(line, row, "height", 0, 300)
+        keys = ["name", "age", "height"]
+    elif kind == "movie":
+        _check_int(line, row, "year", 1850, 32767)
+        names = row.get("actor_names") or []
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            raise RowError(line, "Field 'actor_names' must be a list of names.")
+        keys = ["name", "year", "actor_names"]
+    else:
+        raise RowError(line, "Field 'type' must be 'actor' or 'movie'.")
+
+    # Missing values keep the current ones on update.
+    return kind, {key: row[key] for key in keys if row.get(key) is not None}
+
+
+################################
+# Upserts
+################################
+
+
+@dataclasses.dataclass
+class Batch:
+    """Rows waiting to be upserted, and the lines they were read from."""
+
+    # Keyed by name, so that the last row for a name wins within a batch.
+    items: dict[str, dict] = dataclasses.field(default_factory=dict)
+    rows: int = 0
+    first_line: int = 0
+    last_line: int = 0
+
+    def add(self, line: int, item: dict) -> None:
+        if not self.rows:
+            self.first_line = line
+        self.last_line = line
+        self.rows += 1
+        self.items[item["name"]] = item
+
+
+class BatchUpserter:
+    """Buffer rows and upsert them a batch at a time, each in a transaction.
+
+    Movies can name actors from earlier in the same import: pending actors
+    are always written before movies.
+    """
+
+    def __init__(
+        self, client: edgedb.Client, progress: ImportProgress, batch_size: int
+    ):
+        self.client = client
+        self.progress = progress
+        self.batch_size = batch_size
+        self.actors = Batch()
+        self.movies = Batch()
+
+    def add(self, line: int, kind: str, item: dict) -> None:
+        if kind == "actor":
+            self.actors.add(line, item)
+            if len(self.actors.items) >= self.batch_size:
+                self.flush_actors()
+        else:
+            self.movies.add(line, item)
+            if len(self.movies.items) >= self.batch_size:
+                self.flush_movies()
+
+        self.progress.rows += 1
+        if self.progress.rows % PROGRESS_LOG_INTERVAL == 0:
+            logger.info("Import progress: %s", self.progress.snapshot())
+
+    def flush(self) -> None:
+        self.flush_actors()
+        self.flush_movies()
+
+    def flush_actors(self) -> None:
+        if self.actors.rows:
+            items = list(self.actors.items.values())
+            self._upsert(self.actors, UPSERT_ACTORS, data=json.dumps(items))
+            self.actors = Batch()
+
+    def flush_movies(self) -> None:
+        self.flush_actors()
+        if self.movies.rows:
+            items = list(self.movies.items.values())
+            actor_names = {n for item in items for n in item.get("actor_names", [])}
+            self._upsert(
+                self.movies,
+                UPSERT_MOVIES,
+                data=json.dumps(items),
+                actor_names=list(actor_names),
+            )
+            self.movies = Batch()
+
+    def _upsert(self, batch: Batch, query: str, **kwargs: Any) -> None:
+        # Retried as a whole on transient errors, which upserts allow.
+        try:
+            for tx in self.client.transaction():
+                with tx:
+                    counts = tx.query_single(query, **kwargs)
+        except edgedb.errors.ConstraintViolationError as e:
+            raise BatchError(batch.first_line, batch.last_line, str(e)) from e
+        self.progress.committed += batch.rows
+        self.progress.inserted += counts.inserted
+        self.progress.updated += counts.updated
+
+
+################################
+# Import
+################################
+
+
+@importer.route("/import", methods=["POST"])
+def post_import() -> Response | tuple[dict, int]:
+    """Upsert actors and movies from an NDJSON or CSV request body.
+
+    Every row has a `type` of `actor` or `movie` and the fields that the
+    POST endpoints take. The body is parsed as it arrives, so it can be
+    streamed. Rows are committed in batches. If a row is rejected, the
+    batches before it stay imported, and the response says how many rows
+    were read and how many committed. A batch that fails reports the lines
+    it was read from.
+    """
+    if request.mimetype in NDJSON_TYPES:
+        read_rows = read_ndjson
+    elif request.mimetype in CSV_TYPES:
+        read_rows = read_csv
+    else:
+        return {
+            "error": "Content type must be 'application/x-ndjson' or 'text/csv'."
+        }, HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+    import_id = str(uuid.uuid4())
+    progress = ImportProgress()
+    with _running_lock:
+        _running[import_id] = progress
+    try:
+        lines = codecs.iterdecode(request.stream, "utf-8")
+        upserter = BatchUpserter(get_client(), progress, IMPORT_BATCH_SIZE)
+        try:
+            for line, row in read_rows(lines):
+                upserter.add(line, *validate_row(line, row))
+            upserter.flush()
+        except (RowError, BatchError, UnicodeDecodeError) as e:
+            return {"error": str(e), **progress.snapshot()}, HTTPStatus.BAD_REQUEST
+    finally:
+        with _running_lock:
+            del _running[import_id]
+
+    logger.info("Import done: %s", progress.snapshot())
+    return {"result": progress.snapshot()}, HTTPStatus.OK
+
+
+@importer.route("/import", methods=["GET"])
+def get_imports() -> tuple[dict, int]:
+    """Report the imports running in this worker process."""
+    with _running_lock:
+        running = list(_running.items())
+    return {
+        "result": [{"id": id, **progress.snapshot()} for id, progress in running]
+    }, HTTPStatus.OK
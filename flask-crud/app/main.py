@@ -1,18 +1,49 @@
 from __future__ import annotations
 
+import atexit
+import logging
+import os
 from http import HTTPStatus
 
 from flask import Flask
 
 from app.actors import actor
+from app.db import create_client, get_client, pool_stats
+from app.importer import importer
 from app.movies import movie
 
-app = Flask(__name__)
+logger = logging.getLogger(__name__)
 
-app.register_blueprint(actor)
-app.register_blueprint(movie)
+# Threads serving requests in each worker process, e.g. gunicorn's
+# `--threads`. A WSGI app can't see its server's settings, so this has to be
+# set to match; otherwise the database server suggests a pool size.
+WORKER_THREADS = int(os.getenv("APP_WORKER_THREADS", "0")) or None
 
 
-@app.get("/health_check")
-def health_check() -> tuple[dict, int]:
-    return {"status": "Ok"}, HTTPStatus.OK
+def create_app(worker_threads: int | None = WORKER_THREADS) -> Flask:
+    app = Flask(__name__)
+    if worker_threads is None:
+        logger.warning(
+            "APP_WORKER_THREADS is not set: the database pool is not sized "
+            "to the threads serving requests."
+        )
+    client = app.extensions["edgedb"] = create_client(worker_threads)
+    # Flask has no shutdown hook; close the pool when the worker exits.
+    atexit.register(client.close)
+
+    app.register_blueprint(actor)
+    app.register_blueprint(movie)
+    app.register_blueprint(importer)
+
+    @app.get("/health_check")
+    def health_check() -> tuple[dict, int]:
+        return {"status": "Ok"}, HTTPStatus.OK
+
+    @app.get("/pool_stats")
+    def get_pool_stats() -> tuple[dict, int]:
+        return pool_stats(get_client()), HTTPStatus.OK
+
+    return app
+
+
+app = create_app()
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-import json
 from http import HTTPStatus
+from typing import Any
 
 import edgedb
-from flask import Blueprint, request
+from flask import Blueprint, Response, request
+
+from app.db import get_client, like_prefix
+from app.pagination import page_args, page_query
+from app.projection import DEFAULT_MOVIE_SHAPE, MOVIE_FIELDS, compile_shape
+from app.raw_json import json_response, result_response
 
 movie = Blueprint("movie", __name__)
-client = edgedb.create_client()
 
 ################################
 # Get movies
@@ -15,26 +19,45 @@ client = edgedb.create_client()
 
 
 @movie.route("/movies", methods=["GET"])
-def get_movies() -> tuple[dict, int]:
+def get_movies() -> Response | tuple[dict, int]:
     filter_name = request.args.get("filter_name")
+    name_prefix = request.args.get("name_prefix")
 
-    if not filter_name:
-        movies = client.query_json(
-            """
-            SELECT Movie {name, year, actors : {name, age}};
-            """
+    if filter_name and name_prefix:
+        return {
+            "error": "Only one of 'filter_name' and 'name_prefix' can be provided."
+        }, HTTPStatus.BAD_REQUEST
+
+    try:
+        shape = compile_shape(
+            request.args.get("fields"), MOVIE_FIELDS, DEFAULT_MOVIE_SHAPE
         )
+        page = page_args(request.args)
+    except ValueError as e:
+        return {"error": str(e)}, HTTPStatus.BAD_REQUEST
+
+    args: dict[str, Any] = {}
+    if filter_name:
+        condition = ".name=<str>$filter_name"
+        args["filter_name"] = filter_name
+    elif name_prefix:
+        # Case-insensitive, matching the index on str_lower(.name).
+        condition = "str_lower(.name) LIKE str_lower(<str>$pattern)"
+        args["pattern"] = like_prefix(name_prefix)
     else:
-        movies = client.query_json(
-            """
-            SELECT Movie {name, year, actors : {name, age}}
-                FILTER .name=<str>$filter_name
-            """,
-            filter_name=filter_name,
+        condition = "true"
+
+    if page is not None:
+        return json_response(
+            get_client().query_single_json(
+                page_query("Movie", shape, condition, after="after_id" in page),
+                **page,
+                **args,
+            )
         )
 
-    response_payload = {"result": json.loads(movies)}
-    return response_payload, HTTPStatus.OK
+    movies = get_client().query_json(f"SELECT Movie {shape} FILTER {condition}", **args)
+    return result_response(movies)
 
 
 ################################
@@ -43,7 +66,7 @@ def get_movies() -> tuple[dict, int]:
 
 
 @movie.route("/movies", methods=["POST"])
-def post_movie() -> tuple[dict, int]:
+def post_movie() -> Response | tuple[dict, int]:
     incoming_payload = request.json
 
     # Exception handling.
@@ -67,7 +90,7 @@ def post_movie() -> tuple[dict, int]:
     actor_names = incoming_payload.get("actor_names")
 
     # Save data to db.
-    movie = client.query_single_json(
+    movie = get_client().query_single_json(
         """
         WITH name:=<str>$name, year:=<optional int16>$year,
             actor_names:=<optional array<str>>$actor_names
@@ -84,8 +107,7 @@ def post_movie() -> tuple[dict, int]:
         year=year,
         actor_names=actor_names,
     )
-    response_payload = {"result": json.loads(movie)}
-    return response_payload, HTTPStatus.CREATED
+    return result_response(movie, HTTPStatus.CREATED)
 
 
 ################################
@@ -94,7 +116,7 @@ def post_movie() -> tuple[dict, int]:
 
 
 @movie.route("/movies", methods=["PUT"])
-def put_movies() -> tuple[dict, int]:
+def put_movies() -> Response | tuple[dict, int]:
     incoming_payload = request.json
     filter_name = request.args.get("filter_name")
 
@@ -122,7 +144,7 @@ def put_movies() -> tuple[dict, int]:
             }, HTTPStatus.BAD_REQUEST
 
     actor_names = incoming_payload.get("actor_names", [])
-    movies = client.query_json(
+    movies = get_client().query_json(
         """
         WITH filter_name:=<str>$filter_name, name:=<str>$name,
             year:=<optional int16>$year,
@@ -142,8 +164,7 @@ def put_movies() -> tuple[dict, int]:
         year=year,
         actor_names=actor_names,
     )
-    response_payload = {"result": json.loads(movies)}
-    return response_payload, HTTPStatus.OK
+    return result_response(movies)
 
 
 ################################
@@ -152,7 +173,7 @@ def put_movies() -> tuple[dict, int]:
 
 
 @movie.route("/movies", methods=["DELETE"])
-def delete_movies() -> tuple[dict, int]:
+def delete_movies() -> Response | tuple[dict, int]:
     # Exception handling.
     if not (filter_name := request.args.get("filter_name")):
         return {
@@ -160,7 +181,7 @@ def delete_movies() -> tuple[dict, int]:
         }, HTTPStatus.BAD_REQUEST
 
     try:
-        movies = client.query_json(
+        movies = get_client().query_json(
             "SELECT (DELETE Movie FILTER .name=<str>$filter_name){name}",
             filter_name=filter_name,
         )
@@ -173,5 +194,4 @@ def delete_movies() -> tuple[dict, int]:
             HTTPStatus.BAD_REQUEST,
         )
 
-    response_payload = {"result": json.loads(movies)}
-    return response_payload, HTTPStatus.OK
+    return result_response(movies)
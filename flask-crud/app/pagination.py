@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import datetime
+import uuid
+from typing import Any, Mapping
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Cursors are `<created_at in UTC, to the microsecond>.<id>` of the last row.
+CURSOR_TIME_FORMAT = "%Y%m%d%H%M%S%f"
+CURSOR_TIME_FORMAT_EDGEQL = "YYYYMMDDHH24MISSUS"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    try:
+        created_at, _, id = cursor.partition(".")
+        return (
+            datetime.datetime.strptime(created_at, CURSOR_TIME_FORMAT).replace(
+                tzinfo=datetime.timezone.utc
+            ),
+            uuid.UUID(id),
+        )
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'.")
+
+
+def page_args(args: Mapping[str, str]) -> dict[str, Any] | None:
+    """Read `limit` and `after` from the query string; None if neither is set.
+
+    The cursor's `after_created_at` and `after_id` are only included when
+    `after` is given. Raises `ValueError` on bad values.
+    """
+    limit, after = args.get("limit"), args.get("after")
+    if limit is None and after is None:
+        return None
+
+    if limit is None:
+        page_size = DEFAULT_PAGE_SIZE
+    elif not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        raise ValueError(
+            f"Query parameter 'limit' must be between 1 and {MAX_PAGE_SIZE}."
+        )
+    else:
+        page_size = int(limit)
+
+    if not after:
+        return {"limit": page_size}
+    after_created_at, after_id = decode_cursor(after)
+    return {
+        "limit": page_size,
+        "after_created_at": after_created_at,
+        "after_id": after_id,
+    }
+
+
+def page_query(type_name: str, shape: str, condition: str, after: bool) -> str:
+    """Build a query for one page of `type_name` in keyset order.
+
+    The result is the whole `{"result": [...], "next": <cursor or null>}`
+    response. One extra row is selected so that the database can tell
+    whether another page follows. With `after`, the query takes the
+    cursor's `after_created_at` and `after_id`; the first page has no
+    keyset condition at all.
+    """
+    if after:
+        # The `>=` bound alone is an index range; the rest only trims its
+        # first rows.
+        keyset = """
+                    AND .created_at >= <datetime>$after_created_at
+                    AND (
+                        .created_at > <datetime>$after_created_at
+                        OR .id > <uuid>$after_id
+                    )"""
+    else:
+        keyset = ""
+    return f"""
+        WITH
+            page_size := <int64>$limit,
+            rows := (
+                SELECT {type_name}
+                FILTER ({condition}){keyset}
+                ORDER BY .created_at THEN .id
+                LIMIT page_size + 1
+            ),
+            page := (SELECT rows ORDER BY .created_at THEN .id LIMIT page_size),
+            last := (
+                SELECT page ORDER BY .created_at DESC THEN .id DESC LIMIT 1
+            ),
+        SELECT {{
+            result := (SELECT page {shape} ORDER BY .created_at THEN .id),
+            next := (
+                to_str(last.created_at, '{CURSOR_TIME_FORMAT_EDGEQL}')
+                ++ '.' ++ <str>last.id
+            ) IF count(rows) > page_size ELSE <str>{{}},
+        }}
+    """
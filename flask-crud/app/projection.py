@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Mapping, Union
+
+# Each field a client may ask for, mapped to the shape its links expand to,
+# and the fields returned when `fields` isn't given.
+Fields = Mapping[str, Union["Fields", None]]
+
+ACTOR_FIELDS: Fields = {"name": None, "age": None, "height": None}
+MOVIE_FIELDS: Fields = {
+    "name": None,
+    "year": None,
+    "actors": {"name": None, "age": None, "height": None},
+}
+
+DEFAULT_ACTOR_SHAPE = "{name, age, height}"
+DEFAULT_MOVIE_SHAPE = "{name, year, actors : {name, age}}"
+
+
+def compile_shape(fields: str | None, allowed: Fields, default: str) -> str:
+    """Turn `fields=name,actors.name` into the EdgeQL shape `{name, actors: {name}}`.
+
+    Only names found in `allowed` make it into the shape, so the result is
+    safe to put into query text. A link named without sub-fields gets all
+    of them. Raises `ValueError` on unknown fields.
+    """
+    if not fields:
+        return default
+
+    tree: dict = {}
+    for path in fields.split(","):
+        node, spec = tree, allowed
+        for name in path.strip().split("."):
+            if spec is None or name not in spec:
+                raise ValueError(f"Unknown field '{path.strip()}'.")
+            node = node.setdefault(name, {})
+            spec = spec[name]
+    return _render(tree, allowed)
+
+
+def _render(tree: dict, allowed: Fields) -> str:
+    parts = []
+    for name, subtree in tree.items():
+        spec = allowed[name]
+        if spec is None:
+            parts.append(name)
+        else:
+            parts.append(f"{name}: {_render(subtree or dict.fromkeys(spec), spec)}")
+    return "{" + ", ".join(parts) + "}"
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from http import HTTPStatus
+
+from flask import Response
+
+
+def result_response(result: str, status: int = HTTPStatus.OK) -> Response:
+    """Wrap JSON from `query_json` in the `{"result": ...}` envelope as-is.
+
+    The server already produced valid JSON, so the string is sent unchanged
+    instead of being decoded with `json.loads` and encoded again by Flask.
+    The body is kept in chunks to avoid copying the payload once more;
+    Werkzeug still works out the `Content-Length` from them.
+    """
+    return Response(
+        ['{"result": ', result, "}"], status=status, mimetype="application/json"
+    )
+
+
+def json_response(body: str, status: int = HTTPStatus.OK) -> Response:
+    """Send JSON from `query_single_json` that already is the whole response."""
+    return Response(body, status=status, mimetype="application/json")
@@ -0,0 +1,115 @@
+"""Time name lookups on /actors as the number of actors grows.
+
+Actors named `Bench <run> <n>` are inserted in batches until each of `--sizes`
+is reached, and then `filter_name` and `name_prefix` lookups are timed through
+the app at that size. With the indexes on `.name` and `str_lower(.name)` both
+stay flat; without them they grow with the table. `<run>` is unique to each
+run, and only that run's actors are deleted at the end, in batches.
+
+Run it from the project root, against a database that can be filled:
+
+    $ python -m benchmarks.name_lookup --sizes 10000 100000 1000000 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+import edgedb
+from flask.testing import FlaskClient
+
+from app.main import app
+
+NAME_FORMAT = "{prefix}{:08d}"
+
+INSERT_ACTORS = """
+    FOR name IN array_unpack(<array<str>>$names)
+    UNION (INSERT Actor {name := name})
+"""
+DELETE_ACTORS = """
+    SELECT count((
+        DELETE (SELECT Actor FILTER .name LIKE <str>$pattern LIMIT <int64>$batch)
+    ))
+"""
+
+
+def fill(client: edgedb.Client, prefix: str, start: int, stop: int, batch: int) -> None:
+    for offset in range(start, stop, batch):
+        names = [
+            NAME_FORMAT.format(i, prefix=prefix)
+            for i in range(offset, min(stop, offset + batch))
+        ]
+        client.query(INSERT_ACTORS, names=names)
+
+
+def clear(client: edgedb.Client, prefix: str, batch: int) -> None:
+    # One statement per batch, so that no transaction holds millions of rows.
+    while client.query_single(DELETE_ACTORS, pattern=f"{prefix}%", batch=batch):
+        pass
+
+
+def time_lookups(
+    http: FlaskClient, params: list[dict[str, str]]
+) -> tuple[float, float]:
+    samples = []
+    for query_string in params:
+        start = time.perf_counter()
+        response = http.get("/actors", query_string=query_string)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert response.json and response.json["result"]
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94]
+
+
+def main(args: argparse.Namespace) -> None:
+    # The app of `app.main`, created on import: creating another one would
+    # open a second pool.
+    client = app.extensions["edgedb"]
+    http = app.test_client()
+    rng = random.Random(args.seed)
+    # The prefix is hex, so lower-casing it for `name_prefix` changes nothing.
+    prefix = f"Bench {uuid.uuid4().hex[:8]} "
+
+    print(f"actors named '{prefix}<n>'")
+    print(f"{'actors':>10} {'lookup':<12} {'p50 ms':>8} {'p95 ms':>8}")
+    size = 0
+    try:
+        for target in sorted(args.sizes):
+            fill(client, prefix, size, target, args.batch)
+            size = target
+            names = [
+                NAME_FORMAT.format(rng.randrange(size), prefix=prefix)
+                for _ in range(args.lookups)
+            ]
+            lookups = {
+                "filter_name": [{"filter_name": name} for name in names],
+                # Lower case, and matching ten actors.
+                "name_prefix": [{"name_prefix": name.lower()[:-1]} for name in names],
+            }
+            for label, params in lookups.items():
+                p50, p95 = time_lookups(http, params)
+                print(f"{size:>10} {label:<12} {p50 * 1000:>8.2f} {p95 * 1000:>8.2f}")
+    finally:
+        if not args.keep:
+            clear(client, prefix, args.batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument("--lookups", type=int, default=200, help="per lookup kind")
+    parser.add_argument(
+        "--batch", type=int, default=10_000, help="actors per insert or delete"
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="don't delete the inserted actors"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
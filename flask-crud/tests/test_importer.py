@@ -0,0 +1,151 @@
+import json
+import types
+
+import edgedb
+import pytest
+
+from app.importer import (
+    BatchError,
+    BatchUpserter,
+    ImportProgress,
+    RowError,
+    read_csv,
+    read_ndjson,
+    validate_row,
+)
+
+
+class FakeTransaction:
+    def __init__(self, client):
+        self.client = client
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def query_single(self, query, data, **kwargs):
+        items = json.loads(data)
+        self.client.batches.append([item["name"] for item in items])
+        if self.client.error is not None:
+            raise self.client.error
+        return types.SimpleNamespace(inserted=len(items), updated=0)
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+
+    def transaction(self):
+        yield FakeTransaction(self)
+
+
+def test_read_ndjson():
+    lines = ['{"type": "actor", "name": "A"}\n', "\n", '{"name": "B"}\n']
+    assert list(read_ndjson(lines)) == [
+        (1, {"type": "actor", "name": "A"}),
+        (3, {"name": "B"}),
+    ]
+
+
+@pytest.mark.parametrize(
+    "line, error",
+    [("{", "Line 2: Invalid JSON."), ("[]", "Line 2: Expected an object.")],
+)
+def test_read_ndjson_invalid(line, error):
+    rows = read_ndjson(['{"name": "A"}', line])
+    assert next(rows) == (1, {"name": "A"})
+    with pytest.raises(RowError, match=error):
+        next(rows)
+
+
+def test_read_csv():
+    lines = [
+        "type,name,age,height,year,actor_names\n",
+        "actor,A,30,,,\n",
+        "movie,M,,,2000,A;B\n",
+    ]
+    assert list(read_csv(lines)) == [
+        (2, {"type": "actor", "name": "A", "age": 30}),
+        (3, {"type": "movie", "name": "M", "year": 2000, "actor_names": ["A", "B"]}),
+    ]
+
+
+def test_read_csv_invalid():
+    with pytest.raises(RowError, match="Line 1: The header"):
+        list(read_csv(["kind,title\n"]))
+    with pytest.raises(RowError, match="Line 2: Field 'age' must be an integer."):
+        list(read_csv(["type,name,age\n", "actor,A,old\n"]))
+
+
+def test_validate_row():
+    row = {"type": "actor", "name": "A", "age": 30, "height": None, "extra": 1}
+    assert validate_row(1, row) == ("actor", {"name": "A", "age": 30})
+    row = {"type": "movie", "name": "M", "actor_names": ["A"]}
+    assert validate_row(1, row) == ("movie", {"name": "M", "actor_names": ["A"]})
+
+
+@pytest.mark.parametrize(
+    "row, error",
+    [
+        ({"type": "actor"}, "Field 'name' is required."),
+        ({"type": "actor", "name": "A" * 51}, "cannot be longer than 50"),
+        ({"type": "actor", "name": "A", "age": 101}, "'age' must be between"),
+        ({"type": "actor", "name": "A", "age": True}, "'age' must be between"),
+        ({"type": "movie", "name": "M", "year": 1800}, "'year' must be between"),
+        ({"type": "movie", "name": "M", "actor_names": "A"}, "'actor_names'"),
+        ({"type": "song", "name": "S"}, "Field 'type' must be"),
+    ],
+)
+def test_validate_row_invalid(row, error):
+    with pytest.raises(RowError, match=error):
+        validate_row(7, row)
+
+
+def test_batch_upserter_flushes_full_batches():
+    client, progress = FakeClient(), ImportProgress()
+    upserter = BatchUpserter(client, progress, batch_size=2)
+    upserter.add(1, "actor", {"name": "A"})
+    upserter.add(2, "movie", {"name": "M"})
+    assert client.batches == []
+    assert (progress.rows, progress.committed) == (2, 0)
+
+    upserter.add(3, "actor", {"name": "B"})
+    assert client.batches == [["A", "B"]]
+    assert (progress.rows, progress.committed) == (3, 2)
+
+    upserter.flush()
+    assert client.batches == [["A", "B"], ["M"]]
+    assert (progress.committed, progress.inserted) == (3, 3)
+
+
+def test_batch_upserter_writes_actors_before_movies():
+    client = FakeClient()
+    upserter = BatchUpserter(client, ImportProgress(), batch_size=10)
+    upserter.add(1, "movie", {"name": "M", "actor_names": ["A"]})
+    upserter.add(2, "actor", {"name": "A"})
+    upserter.flush_movies()
+    assert client.batches == [["A"], ["M"]]
+
+
+def test_batch_upserter_keeps_last_row_per_name():
+    client, progress = FakeClient(), ImportProgress()
+    upserter = BatchUpserter(client, progress, batch_size=10)
+    upserter.add(1, "actor", {"name": "A", "age": 1})
+    upserter.add(2, "actor", {"name": "A", "age": 2})
+    upserter.flush()
+    assert client.batches == [["A"]]
+    assert progress.committed == 2
+
+
+def test_batch_upserter_error_names_lines():
+    error = edgedb.errors.ConstraintViolationError("violates constraint")
+    client, progress = FakeClient(error), ImportProgress()
+    upserter = BatchUpserter(client, progress, batch_size=10)
+    upserter.add(4, "actor", {"name": "A"})
+    upserter.add(9, "actor", {"name": "B"})
+    with pytest.raises(BatchError, match="Lines 4-9: violates constraint"):
+        upserter.flush()
+    assert (progress.rows, progress.committed) == (2, 0)
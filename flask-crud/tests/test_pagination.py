@@ -0,0 +1,70 @@
+import datetime
+import uuid
+
+import pytest
+
+from app.pagination import (
+    CURSOR_TIME_FORMAT,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    page_args,
+    page_query,
+)
+
+
+def make_cursor(created_at, id):
+    return f"{created_at.strftime(CURSOR_TIME_FORMAT)}.{id}"
+
+
+def test_decode_cursor():
+    created_at = datetime.datetime(
+        2024, 1, 2, 3, 4, 5, 678, tzinfo=datetime.timezone.utc
+    )
+    id = uuid.uuid4()
+    assert decode_cursor(make_cursor(created_at, id)) == (created_at, id)
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "20240102030405000678", "2024-01-02.not-an-id", "x.y"]
+)
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_page_args_not_paged():
+    assert page_args({}) is None
+    assert page_args({"filter_name": "Test"}) is None
+
+
+def test_page_args():
+    assert page_args({"limit": "10"}) == {"limit": 10}
+
+    created_at = datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc)
+    id = uuid.uuid4()
+    assert page_args({"after": make_cursor(created_at, id)}) == {
+        "limit": DEFAULT_PAGE_SIZE,
+        "after_created_at": created_at,
+        "after_id": id,
+    }
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "ten", str(MAX_PAGE_SIZE + 1)])
+def test_page_args_invalid_limit(limit):
+    with pytest.raises(ValueError, match="limit"):
+        page_args({"limit": limit})
+
+
+def test_page_query_first_page():
+    query = page_query("Actor", "{name}", "true", after=False)
+    assert "$after" not in query
+    assert "??" not in query
+
+
+def test_page_query_after():
+    query = page_query("Actor", "{name}", "true", after=True)
+    # Sargable: a plain range on created_at, with no optional fallback.
+    assert ".created_at >= <datetime>$after_created_at" in query
+    assert "<uuid>$after_id" in query
+    assert "??" not in query
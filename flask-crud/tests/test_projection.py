@@ -0,0 +1,32 @@
+import pytest
+
+from app.projection import (
+    ACTOR_FIELDS,
+    DEFAULT_ACTOR_SHAPE,
+    DEFAULT_MOVIE_SHAPE,
+    MOVIE_FIELDS,
+    compile_shape,
+)
+
+
+def test_compile_shape_default():
+    assert compile_shape(None, ACTOR_FIELDS, DEFAULT_ACTOR_SHAPE) == DEFAULT_ACTOR_SHAPE
+    assert compile_shape("", MOVIE_FIELDS, DEFAULT_MOVIE_SHAPE) == DEFAULT_MOVIE_SHAPE
+
+
+def test_compile_shape_fields():
+    shape = compile_shape("name, actors.name", MOVIE_FIELDS, DEFAULT_MOVIE_SHAPE)
+    assert shape == "{name, actors: {name}}"
+
+
+def test_compile_shape_whole_link():
+    shape = compile_shape("actors", MOVIE_FIELDS, DEFAULT_MOVIE_SHAPE)
+    assert shape == "{actors: {name, age, height}}"
+
+
+@pytest.mark.parametrize(
+    "fields", ["title", "name.first", "actors.year", "name;DELETE Actor"]
+)
+def test_compile_shape_unknown_field(fields):
+    with pytest.raises(ValueError, match="Unknown field"):
+        compile_shape(fields, MOVIE_FIELDS, DEFAULT_MOVIE_SHAPE)
@@ -8,6 +8,12 @@ import strawberry
 client = edgedb.create_async_client()
 
 
+def like_prefix(prefix: str) -> str:
+    """Escape the wildcards of `like` in `prefix` and match anything after it."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
 @strawberry.type
 class Actor:
     name: str | None
@@ -25,7 +31,9 @@ class Movie:
 @strawberry.type
 class Query:
     @strawberry.field
-    async def get_actors(self, filter_name: str | None = None) -> list[Actor]:
+    async def get_actors(
+        self, filter_name: str | None = None, name_prefix: str | None = None
+    ) -> list[Actor]:
         if filter_name:
             actors_json = await client.query_json(
                 """
@@ -34,6 +42,15 @@ class Query:
             """,
                 filter_name=filter_name,
             )
+        elif name_prefix:
+            # Case-insensitive, matching the index on str_lower(.name).
+            actors_json = await client.query_json(
+                """
+                select Actor {name, age, height}
+                  filter str_lower(.name) like str_lower(<str>$pattern)
+            """,
+                pattern=like_prefix(name_prefix),
+            )
         else:
             actors_json = await client.query_json(
                 """
@@ -47,7 +64,9 @@ class Query:
         ]
 
     @strawberry.field
-    async def get_movies(self, filter_name: str | None = None) -> list[Movie]:
+    async def get_movies(
+        self, filter_name: str | None = None, name_prefix: str | None = None
+    ) -> list[Movie]:
         if filter_name:
             movies_json = await client.query_json(
                 """
@@ -56,6 +75,15 @@ class Query:
             """,
                 filter_name=filter_name,
             )
+        elif name_prefix:
+            # Case-insensitive, matching the index on str_lower(.name).
+            movies_json = await client.query_json(
+                """
+                select Movie {name, year, actors : {name}}
+                  filter str_lower(.name) like str_lower(<str>$pattern)
+            """,
+                pattern=like_prefix(name_prefix),
+            )
         else:
             movies_json = await client.query_json(
                 """